@@ -0,0 +1,408 @@
+"""TARS, the Eat the Fish AI. Works on any object implementing GameRules."""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields, replace
+from functools import lru_cache, partial
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
+
+from fish_cache import DecisionCache, open_cache, position_key
+from fish_rules import BOARD_COLS, BOARD_ROWS, FishCount, GameRules, GameState, BoardSnapshot
+from fish_search import (
+    DEFAULT_DIFFICULTY, DIFFICULTY_LEVELS, MOBILITY_WEIGHT, PLACE, REACHABLE_FISH_WEIGHT, TERRITORY_WEIGHT,
+    Position, SearchBudget, SearchEngine, SearchResult, evaluate, evaluate_territory, tile_position
+)
+
+# Likely human replies searched ahead while the human is thinking
+PONDER_REPLIES = 8
+
+# Tuned weights written by fish_tune.py; the defaults below apply without it
+WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tars_weights.json")
+
+@dataclass(frozen=True)
+class EvalWeights:
+    """Heuristic weights, relative to one fish on the tile being left (moves),
+    one neighbouring tile (placements) or one fish of score (search)"""
+    move_to_fish: float = 0.5
+    move_blocks_opponent: float = 2.0
+    move_center: float = 0.1
+    place_adjacent_fish: float = 0.1
+    place_center: float = 0.5
+    search_mobility: float = MOBILITY_WEIGHT
+    search_reachable_fish: float = REACHABLE_FISH_WEIGHT
+    search_territory: float = TERRITORY_WEIGHT
+
+    @classmethod
+    def names(cls) -> List[str]:
+        return [field.name for field in fields(cls)]
+
+    def to_vector(self) -> List[float]:
+        return [getattr(self, name) for name in self.names()]
+
+    @classmethod
+    def from_vector(cls, vector) -> "EvalWeights":
+        return cls(*(float(value) for value in vector))
+
+    @classmethod
+    def load(cls, path: str) -> "EvalWeights":
+        """Read weights from JSON; missing names keep their defaults"""
+        with open(path) as f:
+            data = json.load(f)
+        return cls(**{name: float(data[name]) for name in cls.names() if name in data})
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(asdict(self), f, indent=2)
+            f.write("\n")
+
+@lru_cache(maxsize=None)
+def default_weights() -> EvalWeights:
+    """Tuned weights from WEIGHTS_PATH if present, read once per process"""
+    if os.path.exists(WEIGHTS_PATH):
+        return EvalWeights.load(WEIGHTS_PATH)
+    return EvalWeights()
+
+# "heuristic" is the hand-written evaluation, "learned" the LinearValue in
+# fish_value.py, "territory" fish_search.evaluate_territory's flood fill
+EVALUATIONS = ("heuristic", "learned", "territory")
+DEFAULT_EVALUATION = "heuristic"
+
+# At "classic" the learned and territory evaluations replace the greedy
+# heuristic with a one-ply search
+CLASSIC_SEARCH_BUDGET = SearchBudget(max_depth=1, max_nodes=10_000, max_time_ms=1_000)
+
+@lru_cache(maxsize=None)
+def learned_value():
+    """The trained LinearValue, loaded once per process"""
+    from fish_value import LinearValue  # Keeps numpy out of startup unless asked for
+    return LinearValue.load()
+
+class AIPlayer:
+
+    def __init__(self, player_id: int, difficulty: str = DEFAULT_DIFFICULTY,
+                 weights: Optional[EvalWeights] = None, evaluation: str = DEFAULT_EVALUATION,
+                 search_workers: int = 1, cache: Optional[DecisionCache] = None,
+                 metrics: Optional[Callable[[dict], None]] = None, profile: bool = False,
+                 search_process: bool = False):
+        if difficulty not in DIFFICULTY_LEVELS:
+            raise ValueError(f"unknown difficulty {difficulty!r}, expected one of {', '.join(DIFFICULTY_LEVELS)}")
+        if evaluation not in EVALUATIONS:
+            raise ValueError(f"unknown evaluation {evaluation!r}, expected one of {', '.join(EVALUATIONS)}")
+        self.player_id = player_id
+        self.difficulty = difficulty
+        self.evaluation = evaluation
+        self.budget = DIFFICULTY_LEVELS[difficulty]
+        self.weights = weights if weights is not None else default_weights()
+        if evaluation == "learned":
+            value = learned_value()
+            self.engine = SearchEngine(value, batch_evaluator=value.evaluate_batch)
+            if self.budget is None:
+                self.budget = CLASSIC_SEARCH_BUDGET
+            evaluation_id = value.weights.tobytes()
+        elif evaluation == "territory":
+            self.engine = SearchEngine(partial(evaluate_territory, territory_weight=self.weights.search_territory))
+            if self.budget is None:
+                self.budget = CLASSIC_SEARCH_BUDGET
+            evaluation_id = repr(self.weights.search_territory).encode()
+        else:
+            self.engine = SearchEngine(partial(
+                evaluate,
+                mobility_weight=self.weights.search_mobility,
+                reachable_fish_weight=self.weights.search_reachable_fish,
+            ))
+            evaluation_id = repr(self.weights.to_vector()).encode()
+        # Time move generation and evaluation for decision_metrics(); costs nodes/s
+        self.engine.profile = profile
+        self.last_result: Optional[SearchResult] = None
+        # Called with decision_metrics() after every search, e.g. json_lines_metrics()
+        self.metrics = metrics
+        self.last_metrics: Optional[dict] = None
+
+        # Optional persistent cache, consulted before every search;
+        # entries are only shared between players that would search alike
+        self.cache = cache
+        self.cache_context = f"{difficulty}/{evaluation}/".encode() + evaluation_id
+
+        # With several search workers each turn's search runs as Lazy SMP in
+        # fish_smp. search_process moves searches and pondering out of this
+        # process even with one worker, so they never hold its GIL; the cost
+        # is a spawned process and pickling each position.
+        self.parallel = None
+        if (search_workers > 1 or search_process) and self.budget is not None:
+            from fish_smp import ParallelSearch  # Only pay for the process pool when asked
+            self.parallel = ParallelSearch(search_workers, profile=profile)
+
+        # Pondering and background searches share one worker thread, so the
+        # engine and its transposition table are never used concurrently
+        self.worker: Optional[ThreadPoolExecutor] = None
+        self.ponder_stop = threading.Event()
+        self.ponder_results: Dict[Tuple, SearchResult] = {}
+        self.pending: Optional[Future] = None
+        self.pending_key: Optional[Tuple] = None
+
+    def background(self) -> ThreadPoolExecutor:
+        if self.worker is None:
+            self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tars")
+        return self.worker
+
+    def close(self):
+        self.stop_pondering()
+        if self.worker is not None:
+            self.worker.shutdown(wait=False, cancel_futures=True)
+            self.worker = None
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+
+    def start_pondering(self, game: GameRules):
+        """Search the opponent's likely replies while they think"""
+        if self.budget is None or game.game_phase == "game_over" or game.current_player == self.player_id:
+            return
+        self.stop_pondering()
+        # Fresh event and result dict, so a ponder task still winding down
+        # cannot clear the new stop flag or write into the new results
+        self.ponder_stop = threading.Event()
+        self.ponder_results = {}
+        self.background().submit(self.ponder, Position.from_game(game), self.ponder_stop, self.ponder_results)
+
+    def stop_pondering(self):
+        self.ponder_stop.set()
+        if self.parallel is not None:
+            self.parallel.halt()
+
+    def ponder(self, position: Position, stop: threading.Event, results: Dict[Tuple, SearchResult]):
+        opponent = position.side
+        replies = sorted(
+            position.legal_moves(),
+            key=lambda reply: -self.engine.evaluator(position.apply(reply), opponent)
+        )
+        for reply in replies[:PONDER_REPLIES]:
+            if stop.is_set():
+                return
+            child = position.apply(reply)
+            if child.over or child.side != self.player_id:
+                continue
+            if self.parallel is not None:
+                result = self.parallel.search(child, self.budget, self.engine.evaluator, self.engine.batch_evaluator,
+                                              stop)
+            else:
+                result = self.engine.search(child, self.budget, stop)
+            if not stop.is_set():
+                results[child.key()] = result
+
+    def start_search(self, game: GameRules):
+        """Begin this turn's search in the background, e.g. while ai_delay runs"""
+        if self.budget is None:
+            return
+        self.stop_pondering()
+        position = Position.from_game(game)
+        self.pending_key = position.key()
+        self.pending = self.background().submit(self.search_position, position)
+
+    def search_position(self, position: Position) -> SearchResult:
+        cache_key = None
+        if self.cache is not None:
+            cache_key = position_key(self.cache_context, position)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        result = self.search_uncached(position)
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        return result
+
+    def search_uncached(self, position: Position) -> SearchResult:
+        pondered = self.ponder_results.get(position.key())
+        if pondered is not None and pondered.depth >= self.budget.max_depth:
+            return replace(pondered, ponder_hit=True)
+
+        # On a partial hit the transposition table is already warm, so the
+        # same budget reaches deeper than a cold search would
+        if self.parallel is not None:
+            result = self.parallel.search(position, self.budget, self.engine.evaluator, self.engine.batch_evaluator)
+        else:
+            result = self.engine.search(position, self.budget)
+        result.ponder_hit = pondered is not None
+        return result
+
+    def search(self, game: GameRules) -> SearchResult:
+        """Run the anytime search within this level's budget"""
+        started = time.perf_counter()
+        position = Position.from_game(game)
+        if self.pending is not None and self.pending_key == position.key():
+            result = self.pending.result()
+        else:
+            self.stop_pondering()
+            if self.worker is not None:
+                result = self.worker.submit(self.search_position, position).result()
+            else:
+                result = self.search_position(position)
+
+        self.pending = self.pending_key = None
+        self.last_result = result
+        self.last_metrics = self.decision_metrics(result, game.game_phase, (time.perf_counter() - started) * 1000)
+        if self.metrics is not None:
+            self.metrics(self.last_metrics)
+        return result
+
+    def decision_metrics(self, result: SearchResult, phase: str, wait_ms: float) -> dict:
+        """One decision's statistics as a JSON-ready dict.
+
+        elapsed_ms is the search itself, wait_ms what the caller waited (less
+        when the search ran in the background during ai_delay); search_ms is
+        what the search spent outside move generation and evaluation. The three
+        timings are only present when the player was created with profile.
+        """
+        record = {
+            "player": self.player_id,
+            "difficulty": self.difficulty,
+            "evaluation": self.evaluation,
+            "phase": phase,
+            "move": list(result.move) if result.move is not None else None,
+            "score": round(result.score, 3),
+            "depth": result.depth,
+            "nodes": result.nodes,
+            "elapsed_ms": round(result.elapsed_ms, 2),
+            "wait_ms": round(wait_ms, 2),
+            "nps": round(result.nodes * 1000 / result.elapsed_ms) if result.elapsed_ms > 0 else 0,
+            "ponder_hit": result.ponder_hit,
+            "cache_hit": result.cache_hit,
+        }
+        telemetry = result.telemetry
+        if telemetry is not None:
+            record.update(
+                branching=round(telemetry.children / telemetry.expanded, 2) if telemetry.expanded else 0.0,
+                table_hit_rate=round(telemetry.table_hits / telemetry.table_probes, 3) if telemetry.table_probes else 0.0,
+                evaluations=telemetry.evaluations,
+                margin=None if telemetry.margin is None else round(telemetry.margin, 3),
+            )
+            if telemetry.profiled:
+                movegen_ms = telemetry.movegen_s * 1000
+                eval_ms = telemetry.eval_s * 1000
+                record.update(
+                    movegen_ms=round(movegen_ms, 2),
+                    eval_ms=round(eval_ms, 2),
+                    search_ms=round(max(0.0, result.elapsed_ms - movegen_ms - eval_ms), 2),
+                )
+        if self.cache is not None:
+            lookups = self.cache.hits + self.cache.misses
+            record["decision_cache_hit_rate"] = round(self.cache.hits / lookups, 3) if lookups else 0.0
+        return record
+
+    def evaluate_move(self, game: GameRules, from_col, from_row, to_col, to_row):
+        to_tile = game.get_tile(to_col, to_row)
+        if not to_tile:
+            return -1000
+
+        from_tile = game.get_tile(from_col, from_row)
+        score = from_tile.fish_count.value if from_tile else 0
+        score += to_tile.fish_count.value * self.weights.move_to_fish
+
+        opponent_blocked = 0
+        for penguin in game.get_player_penguins(1 - self.player_id):
+            if game.can_reach(penguin.col, penguin.row, to_col, to_row):
+                opponent_blocked += 1
+        score += opponent_blocked * self.weights.move_blocks_opponent
+
+        center_col, center_row = BOARD_COLS // 2, BOARD_ROWS // 2
+        distance_from_center = abs(to_col - center_col) + abs(to_row - center_row)
+        score -= distance_from_center * self.weights.move_center
+
+        return score
+
+    def get_best_move(self, game: GameRules):
+        if self.budget is None:
+            return self.get_greedy_move(game)
+
+        move = self.search(game).move
+        if move is None or move[0] == PLACE:
+            return None
+        return (*tile_position(move[0]), *tile_position(move[1]))
+
+    def get_best_placement(self, game: GameRules):
+        if self.budget is None:
+            return self.get_greedy_placement(game)
+
+        move = self.search(game).move
+        if move is None or move[0] != PLACE:
+            return None
+        return tile_position(move[1])
+
+    def get_greedy_move(self, game: GameRules):
+        best_move = None
+        best_score = -1000
+
+        for penguin in game.get_player_penguins(self.player_id):
+            valid_moves = game.get_valid_moves(penguin.col, penguin.row)
+
+            for to_col, to_row in valid_moves:
+                score = self.evaluate_move(game, penguin.col, penguin.row, to_col, to_row)
+
+                if score > best_score:
+                    best_score = score
+                    best_move = (penguin.col, penguin.row, to_col, to_row)
+
+        return best_move
+
+    def get_greedy_placement(self, game: GameRules):
+        best_placement = None
+        best_score = -1000
+
+        for col in range(BOARD_COLS):
+            for row in range(BOARD_ROWS):
+                tile = game.get_tile(col, row)
+                if tile and not tile.has_penguin and tile.fish_count == FishCount.ONE:
+                    score = 0
+
+                    adjacent_count = 0
+                    for adj_col, adj_row in game.get_adjacent_positions(col, row):
+                        adj_tile = game.get_tile(adj_col, adj_row)
+                        if adj_tile and adj_tile.exists:
+                            adjacent_count += 1
+                            score += adj_tile.fish_count.value * self.weights.place_adjacent_fish
+
+                    score += adjacent_count
+
+                    center_col, center_row = BOARD_COLS // 2, BOARD_ROWS // 2
+                    distance_from_center = abs(col - center_col) + abs(row - center_row)
+                    score -= distance_from_center * self.weights.place_center
+
+                    if score > best_score:
+                        best_score = score
+                        best_placement = (col, row)
+
+        return best_placement
+
+    def choose_action(self, game: GameRules) -> Optional[Tuple[int, ...]]:
+        """Best placement (col, row) or move (from_col, from_row, to_col, to_row) for the current phase"""
+        if game.game_phase == "placement":
+            return self.get_best_placement(game)
+        if game.game_phase == "playing":
+            return self.get_best_move(game)
+        return None
+
+def json_lines_metrics(stream: TextIO = sys.stderr) -> Callable[[dict], None]:
+    """Metrics callback writing each decision as one JSON line"""
+    def emit(record: dict):
+        stream.write(json.dumps(record) + "\n")
+        stream.flush()
+    return emit
+
+def choose_action_for_snapshot(snapshot: BoardSnapshot, difficulty: str = DEFAULT_DIFFICULTY,
+                               cache_path: Optional[str] = None,
+                               max_time_ms: Optional[float] = None) -> Optional[Tuple[int, ...]]:
+    """Process-pool entry point: pick the side to move's action from a snapshot,
+    searching for at most max_time_ms if given"""
+    cache = None
+    if cache_path is not None:
+        cache = open_cache(cache_path)
+    game = GameState.from_snapshot(snapshot)
+    player = AIPlayer(snapshot.current_player, difficulty, cache=cache)
+    if max_time_ms is not None and player.budget is not None:
+        player.budget = replace(player.budget, max_time_ms=min(player.budget.max_time_ms, max_time_ms))
+    return player.choose_action(game)
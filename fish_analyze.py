@@ -0,0 +1,178 @@
+"""Batch analysis of Eat the Fish positions from JSON lines, on a process pool.
+
+Each input line is one position:
+
+    {"id": "report-17", "fish": [1, 2, 3, ...], "penguins": [[0, 2, 1], [1, 5, 3]],
+     "side": 0, "scores": [12, 9], "expect": [[2, 1, 2, 4]]}
+
+fish holds the 48 tile counts in row-major order (or one list per row), with
+0 for removed tiles; penguins are [player, col, row] in placement order. side
+(or current_player) is the player to move. scores, phase and
+penguins_per_player are optional; the phase follows from the penguin count.
+The state objects printed by fish_server.py are valid input.
+
+Each output line carries the line number, id, the chosen action ([col, row]
+for a placement, [from_col, from_row, to_col, to_row] for a move) and, at
+the search difficulties, the search statistics of AIPlayer.decision_metrics.
+With expect, a list of acceptable actions, pass says whether the action was
+one of them, for regression suites of known tactics.
+
+    python fish_analyze.py positions.jsonl --difficulty hard > results.jsonl
+    cat positions.jsonl | python fish_analyze.py - --workers 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, Iterator, List, Optional
+
+from fish_ai import DEFAULT_EVALUATION, EVALUATIONS, AIPlayer, learned_value
+from fish_cache import open_cache
+from fish_rules import BOARD_COLS, BOARD_ROWS, TOTAL_TILES, BoardSnapshot, GameState
+from fish_search import DIFFICULTY_LEVELS
+
+# Positions in flight per worker; bounds memory when reading a long stream
+QUEUE_PER_WORKER = 4
+
+# decision_metrics fields already in the output or fixed for the whole run
+_SKIPPED_METRICS = ("player", "difficulty", "evaluation", "phase", "move")
+
+def game_from_record(record: dict) -> GameState:
+    """GameState for one input position; raises ValueError on a malformed one"""
+    fish = record["fish"]
+    if fish and isinstance(fish[0], list):
+        fish = [count for row in fish for count in row]
+    if len(fish) != TOTAL_TILES or any(count not in (0, 1, 2, 3) for count in fish):
+        raise ValueError(f"fish must hold {TOTAL_TILES} counts from 0 to 3")
+
+    penguins_per_player = int(record.get("penguins_per_player", 4))
+    penguins = tuple(tuple(int(value) for value in penguin) for penguin in record.get("penguins", ()))
+    seen = set()
+    for penguin in penguins:
+        if len(penguin) != 3 or penguin[0] not in (0, 1):
+            raise ValueError(f"penguin {list(penguin)} is not [player, col, row]")
+        if not (0 <= penguin[1] < BOARD_COLS and 0 <= penguin[2] < BOARD_ROWS) or penguin[1:] in seen:
+            raise ValueError(f"penguin {list(penguin)} is off the board or on an occupied tile")
+        seen.add(penguin[1:])
+    placed = [sum(1 for penguin in penguins if penguin[0] == player) for player in (0, 1)]
+    if max(placed) > penguins_per_player:
+        raise ValueError(f"more than {penguins_per_player} penguins for one player")
+
+    side = record.get("side", record.get("current_player"))
+    if side not in (0, 1):
+        raise ValueError("side to move must be 0 or 1")
+    placing = min(placed) < penguins_per_player
+    phase = record.get("phase") or ("placement" if placing else "playing")
+    if phase not in ("placement", "playing", "game_over"):
+        raise ValueError(f"unknown phase {phase!r}")
+    if phase == "placement" and placed[side] >= penguins_per_player:
+        raise ValueError(f"player {side} has no penguin left to place")
+    if phase == "playing" and placing:
+        raise ValueError(f"phase is playing but not all {penguins_per_player} penguins per player are placed")
+    scores = tuple(int(score) for score in record.get("scores", (0, 0)))
+
+    snapshot = BoardSnapshot(bytes(fish), penguins, scores, side, phase)
+    return GameState.from_snapshot(snapshot, penguins_per_player)
+
+def analyse_line(number: int, line: str, difficulty: str, evaluation: str,
+                 cache_path: Optional[str] = None, profile: bool = False) -> dict:
+    """Process-pool entry point: the output record for one input line"""
+    result = {"line": number}
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object")
+        if "id" in record:
+            result["id"] = record["id"]
+        game = game_from_record(record)
+    except (ValueError, TypeError, KeyError) as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+        return result
+
+    try:
+        cache = open_cache(cache_path) if cache_path else None
+        player = AIPlayer(game.current_player, difficulty, evaluation=evaluation, cache=cache, profile=profile)
+        try:
+            action = player.choose_action(game)
+        finally:
+            player.close()
+    except Exception as error:
+        # One bad position or a failing cache must not end a long streamed run
+        result["error"] = f"{type(error).__name__}: {error}"
+        return result
+
+    result.update(phase=game.game_phase, side=game.current_player,
+                  action=list(action) if action is not None else None)
+    if player.last_metrics is not None:
+        result.update((key, value) for key, value in player.last_metrics.items() if key not in _SKIPPED_METRICS)
+    if "expect" in record:
+        result["pass"] = result["action"] in [list(expected) for expected in record["expect"]]
+    return result
+
+def analyse_lines(lines: Iterable[str], difficulty: str, evaluation: str = DEFAULT_EVALUATION,
+                  workers: Optional[int] = None, cache_path: Optional[str] = None,
+                  profile: bool = False) -> Iterator[dict]:
+    """Results in input order, yielded as they finish; only a few lines per
+    worker are read ahead, so the input can be an endless stream"""
+    analyse = partial(analyse_line, difficulty=difficulty, evaluation=evaluation, cache_path=cache_path,
+                      profile=profile)
+    workers = workers or os.cpu_count() or 1
+    window = QUEUE_PER_WORKER * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            pending.append(pool.submit(analyse, number, line))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Analyse Eat the Fish positions from JSON lines with TARS")
+    parser.add_argument("input", help="JSON-lines file of positions, or - for stdin")
+    parser.add_argument("--difficulty", choices=list(DIFFICULTY_LEVELS), default="hard",
+                        help="search budget per position")
+    parser.add_argument("--evaluation", choices=EVALUATIONS, default=DEFAULT_EVALUATION)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument("--decision-cache", default=None, metavar="PATH",
+                        help="SQLite file caching TARS's decisions across runs")
+    parser.add_argument("--profile", action="store_true",
+                        help="also time move generation and evaluation (slows the search a little)")
+    args = parser.parse_args(argv)
+    if args.evaluation == "learned":
+        # Fail once here rather than once per position in the workers
+        try:
+            learned_value()
+        except (OSError, ValueError) as error:
+            parser.error(f"cannot load the learned evaluation: {error}")
+
+    started = time.perf_counter()
+    counts = {"positions": 0, "errors": 0, "passed": 0, "failed": 0}
+    source = sys.stdin if args.input == "-" else open(args.input)
+    try:
+        for result in analyse_lines(source, args.difficulty, args.evaluation, args.workers, args.decision_cache,
+                                    args.profile):
+            print(json.dumps(result), flush=True)
+            counts["positions"] += 1
+            counts["errors"] += "error" in result
+            if "pass" in result:
+                counts["passed" if result["pass"] else "failed"] += 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    seconds = time.perf_counter() - started
+    print(json.dumps({**counts, "seconds": round(seconds, 2),
+                      "positions_per_sec": round(counts["positions"] / seconds, 1)}), file=sys.stderr)
+    if counts["failed"] or counts["errors"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
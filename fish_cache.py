@@ -0,0 +1,132 @@
+"""Persistent cache of TARS's search decisions, shared across processes and restarts.
+
+Openings repeat constantly, so a position TARS has already searched costs a
+lookup instead of a search. Decisions live in SQLite (WAL mode, so several
+game and server processes can use one file) keyed by a digest of the
+position and of everything else that shapes the result: difficulty,
+evaluation and weights. The least recently used entries are evicted once
+the file holds more than max_entries.
+"""
+
+import hashlib
+import sqlite3
+import struct
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+from fish_search import Position, SearchResult
+
+MAX_ENTRIES = 200_000
+EVICT_CHECK_INTERVAL = 256  # Writes between size checks
+EVICT_SLACK = 0.1           # Share of max_entries freed at once, so eviction is rare
+TOUCH_INTERVAL_NS = 60 * 10**9  # Hits refresh the LRU stamp at most this often
+BUSY_TIMEOUT = 0.5          # Seconds to wait for another process's write
+
+_SCALARS = struct.Struct("<Qbbhb")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    key BLOB PRIMARY KEY,
+    move_from INTEGER NOT NULL,
+    move_to INTEGER NOT NULL,
+    score REAL NOT NULL,
+    depth INTEGER NOT NULL,
+    used INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS decisions_used ON decisions (used);
+"""
+
+def position_key(context: bytes, position: Position) -> bytes:
+    """Digest of context and position; penguin order and sunk tiles' fish do not matter"""
+    tiles = position.tiles
+    digest = hashlib.blake2b(context, digest_size=16)
+    digest.update(bytes(fish if tiles >> index & 1 else 0 for index, fish in enumerate(position.fish)))
+    digest.update(bytes(sorted(position.penguins[0])))
+    digest.update(b"/")
+    digest.update(bytes(sorted(position.penguins[1])))
+    digest.update(_SCALARS.pack(tiles, position.side, position.placing,
+                                position.scores[0] - position.scores[1], position.penguins_per_player))
+    return digest.digest()
+
+class DecisionCache:
+    """Best move, score and depth per position digest, bounded with LRU eviction.
+
+    Cache trouble (a locked or unreadable file) never stops play: lookups
+    then miss and stores are skipped.
+    """
+
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()  # AIPlayer may search on its background thread
+        self.connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                                          check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: bytes) -> Optional[SearchResult]:
+        started = time.perf_counter()
+        now = time.time_ns()
+        with self.lock:
+            try:
+                row = self.connection.execute(
+                    "SELECT move_from, move_to, score, depth, used FROM decisions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[4] > TOUCH_INTERVAL_NS:
+                    self.connection.execute("UPDATE decisions SET used = ? WHERE key = ?", (now, key))
+            except sqlite3.Error:
+                self.errors += 1
+                return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        move_from, move_to, score, depth, _ = row
+        return SearchResult((move_from, move_to), score, depth, 0, (time.perf_counter() - started) * 1000,
+                            cache_hit=True)
+
+    def put(self, key: bytes, result: SearchResult):
+        """Store a finished search; an entry from a deeper search is kept instead"""
+        if result.move is None or result.depth < 1:
+            return
+        with self.lock:
+            try:
+                self.connection.execute(
+                    "INSERT INTO decisions VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "move_from = excluded.move_from, move_to = excluded.move_to, score = excluded.score, "
+                    "depth = excluded.depth, used = excluded.used WHERE excluded.depth >= decisions.depth",
+                    (key, result.move[0], result.move[1], result.score, result.depth, time.time_ns()),
+                )
+                self.writes += 1
+                if self.writes % EVICT_CHECK_INTERVAL == 0:
+                    self.evict()
+            except sqlite3.Error:
+                self.errors += 1
+
+    def evict(self):
+        (entries,) = self.connection.execute("SELECT COUNT(*) FROM decisions").fetchone()
+        if entries > self.max_entries:
+            excess = entries - int(self.max_entries * (1 - EVICT_SLACK))
+            self.connection.execute(
+                "DELETE FROM decisions WHERE key IN (SELECT key FROM decisions ORDER BY used LIMIT ?)", (excess,)
+            )
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+@lru_cache(maxsize=None)
+def open_cache(path: str) -> DecisionCache:
+    """One DecisionCache per file per process, e.g. for process-pool workers"""
+    return DecisionCache(path)
@@ -0,0 +1,292 @@
+"""Equivalence checks for the engines that reimplement Eat the Fish's rules.
+
+GameRules is the reference. Its incremental reach is checked against plain
+ray walks over the board, and CompactGame (the server's packed games), the
+search's Position and VectorEnv (bulk NumPy simulation) are checked against
+it. Every check plays seeded random games through both sides and compares
+the legal actions and the resulting state after each step; the first
+disagreement is reported and the exit status is 1.
+
+The table check runs the same searches over fish_smp.SharedTable and over
+a dict that keeps one entry per SharedTable slot, so the two must agree
+node for node. The server check drives fish_server.GameServer through bad
+requests and a bad AI answer.
+
+    python fish_check.py rules --games 300
+    python fish_check.py vector --boards 256
+    python fish_check.py table
+    python fish_check.py server
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fish_rules import (
+    BOARD_COLS, BOARD_ROWS, DIRECTIONS, TOTAL_TILES, BoardSnapshot, CompactGame, FishCount, GameState, tile_index,
+    tile_position,
+)
+from fish_search import PLACE, Move, Position, SearchBudget, SearchEngine
+from fish_smp import SharedTable
+
+# Node budget per table-check search; no time limit, so searches are repeatable
+TABLE_CHECK_BUDGET = SearchBudget(max_depth=30, max_nodes=10_000, max_time_ms=3_600_000)
+
+Action = Tuple[int, ...]
+
+class Mismatch(Exception):
+    """Raised when an engine disagrees with the reference"""
+
+def expect_equal(what: str, expected, actual, game: int, step: int):
+    if expected != actual:
+        raise Mismatch(f"game {game}, step {step}: {what} differs: expected {expected!r}, got {actual!r}")
+
+def walked_moves(game: GameState, col: int, row: int) -> List[Tuple[int, int]]:
+    """Targets of the penguin on (col, row) by walking the board, without move_reach"""
+    occupied = {(p.col, p.row) for p in game.penguins}
+    targets = []
+    for dx, dy in DIRECTIONS:
+        target_col, target_row = col + dx, row + dy
+        while (0 <= target_col < BOARD_COLS and 0 <= target_row < BOARD_ROWS
+               and game.board[target_row][target_col].exists and (target_col, target_row) not in occupied):
+            targets.append((target_col, target_row))
+            target_col, target_row = target_col + dx, target_row + dy
+    return sorted(targets)
+
+def reference_actions(game: GameState) -> List[Action]:
+    """Legal actions of the side to move, walked on the board"""
+    if game.game_phase == "placement":
+        return sorted((tile.col, tile.row) for board_row in game.board for tile in board_row
+                      if tile.exists and not tile.has_penguin and tile.fish_count == FishCount.ONE)
+    if game.game_phase == "playing":
+        return sorted((p.col, p.row, *target) for p in game.get_player_penguins(game.current_player)
+                      if game.board[p.row][p.col].exists for target in walked_moves(game, p.col, p.row))
+    return []
+
+def position_actions(position: Position) -> List[Action]:
+    return sorted(tile_position(to_index) if from_index == PLACE
+                  else (*tile_position(from_index), *tile_position(to_index))
+                  for from_index, to_index in position.legal_moves())
+
+def canonical(snapshot: BoardSnapshot) -> BoardSnapshot:
+    """Snapshot with penguins sorted, since engines store them in different orders"""
+    return snapshot._replace(penguins=tuple(sorted(snapshot.penguins)))
+
+def check_rules(games: int, seed: int = 1) -> dict:
+    """GameState's incremental reach against ray walks, and CompactGame and
+    Position against GameState, over random games"""
+    steps = 0
+    for number in range(games):
+        random.seed(seed + number)
+        game = GameState()
+        random.seed(seed + number)
+        compact = CompactGame()
+        position = Position.from_game(game)
+        rng = random.Random(seed + number)
+
+        for step in range(1000):
+            actions = reference_actions(game)
+            for p in game.penguins:
+                if game.game_phase == "playing" and game.board[p.row][p.col].exists:
+                    expect_equal(f"moves of the penguin on {(p.col, p.row)}", walked_moves(game, p.col, p.row),
+                                 sorted(game.get_valid_moves(p.col, p.row)), number, step)
+            expect_equal("snapshot", canonical(game.snapshot()), canonical(compact.snapshot()), number, step)
+            expect_equal("CompactGame actions", actions, sorted(compact.legal_actions()), number, step)
+            expect_equal("Position actions", actions, position_actions(position), number, step)
+            expect_equal("Position scores", tuple(game.player_scores), position.scores, number, step)
+            phase = "game_over" if position.over else "placement" if position.placing else "playing"
+            expect_equal("Position phase", game.game_phase, phase, number, step)
+            if not actions:
+                break
+
+            action = rng.choice(actions)
+            if len(action) == 2:
+                game.play_placement(*action)
+                compact.play_placement(*action)
+                position = position.apply((PLACE, tile_index(*action)))
+            else:
+                game.play_move(*action)
+                compact.play_move(*action)
+                position = position.apply((tile_index(*action[:2]), tile_index(*action[2:])))
+            if game.game_phase != "game_over":
+                expect_equal("Position side to move", game.current_player, position.side, number, step)
+            steps += 1
+    return {"games": games, "steps": steps}
+
+def vector_action(action: int) -> Action:
+    """A VectorEnv action as a GameState placement or move"""
+    from_index, to_index = divmod(action, TOTAL_TILES)
+    if from_index == to_index:
+        return tile_position(to_index)
+    return (*tile_position(from_index), *tile_position(to_index))
+
+def check_vector(boards: int, seed: int = 1) -> dict:
+    """VectorEnv against one GameState per board, all boards stepped together"""
+    from fish_vector import VectorEnv  # Only this check needs NumPy
+
+    env = VectorEnv(boards, seed=seed)
+    games = [GameState.from_snapshot(env.snapshot(board)) for board in range(boards)]
+    steps = 0
+    for step in range(1000):
+        legal = env.legal_actions()
+        legal_boards, legal_actions = legal
+        for board, game in enumerate(games):
+            expect_equal("snapshot", canonical(game.snapshot()), canonical(env.snapshot(board)), board, step)
+            actions = sorted(vector_action(int(action)) for action in legal_actions[legal_boards == board])
+            expect_equal("VectorEnv actions", reference_actions(game), actions, board, step)
+        if env.done.all():
+            break
+
+        active = ~env.done
+        chosen = env.random_actions(legal)
+        env.step(chosen, legal)
+        for board, game in enumerate(games):
+            if active[board]:
+                action = vector_action(int(chosen[board]))
+                if len(action) == 2:
+                    game.play_placement(*action)
+                else:
+                    game.play_move(*action)
+                steps += 1
+    return {"boards": boards, "steps": steps}
+
+class SlotTable:
+    """Dict-backed table with SharedTable's slot mapping: one entry per slot,
+    the newest write wins"""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.entries: Dict[int, Tuple[Tuple, Tuple]] = {}
+
+    def get(self, key: Tuple) -> Optional[Tuple[int, int, float, Optional[Move]]]:
+        stored = self.entries.get(hash(key) & (self.slots - 1))
+        return stored[1] if stored is not None and stored[0] == key else None
+
+    def __setitem__(self, key: Tuple, entry: Tuple[int, int, float, Optional[Move]]):
+        self.entries[hash(key) & (self.slots - 1)] = (key, entry)
+
+def check_table(games: int, slots: int, seed: int = 1) -> dict:
+    """SharedTable entries read back as written, also through a second
+    mapping, and searches over it match SlotTable's node for node"""
+    rng = random.Random(seed)
+    table = SharedTable(slots)
+    attached = SharedTable(slots, table.name)
+    try:
+        for number in range(slots):
+            key = (rng.getrandbits(64), number)
+            move = rng.choice([None, (PLACE, rng.randrange(TOTAL_TILES)),
+                               (rng.randrange(TOTAL_TILES), rng.randrange(TOTAL_TILES))])
+            entry = (rng.randrange(256), rng.randrange(3), rng.uniform(-100, 100), move)
+            table[key] = entry
+            expect_equal("entry", entry, table.get(key), 0, number)
+            expect_equal("entry through a second mapping", entry, attached.get(key), 0, number)
+        table.clear()
+
+        searches = nodes = 0
+        for number in range(games):
+            random.seed(seed + number)
+            game = GameState()
+            rng = random.Random(seed + number)
+            shared, reference = SearchEngine(table=table), SearchEngine(table=SlotTable(slots))
+            for step in range(1000):
+                actions = reference_actions(game)
+                if not actions:
+                    break
+                if step % 4 == 0:
+                    position = Position.from_game(game)
+                    expected = reference.search(position, TABLE_CHECK_BUDGET)
+                    actual = shared.search(position, TABLE_CHECK_BUDGET)
+                    expect_equal("search result", (expected.move, expected.score, expected.depth, expected.nodes),
+                                 (actual.move, actual.score, actual.depth, actual.nodes), number, step)
+                    searches += 1
+                    nodes += actual.nodes
+                action = rng.choice(actions)
+                if len(action) == 2:
+                    game.play_placement(*action)
+                else:
+                    game.play_move(*action)
+            table.clear()
+    finally:
+        attached.close()
+        table.close()
+    return {"games": games, "slots": slots, "searches": searches, "nodes": nodes}
+
+async def server_requests(seed: int) -> dict:
+    from fish_server import GameServer  # Only this check needs the server
+
+    def request(**fields) -> bytes:
+        return json.dumps(fields).encode()
+
+    random.seed(seed)
+    server = GameServer(workers=1)
+    try:
+        reply = await server.handle_line(request(op="new"))
+        session = server.sessions[reply["session"]]
+        session.turn_started -= 10.0  # The human has been thinking for 10 seconds
+        for attempt in range(3):
+            reply = await server.handle_line(request(op="place", session=session.session_id, col=BOARD_COLS, row=0))
+            expect_equal("error for an off-board place", "bad_request", reply.get("error"), 0, attempt)
+        expect_equal("seconds charged after three rejected places", 10, round(session.human_clock), 0, 3)
+
+        async def occupied_tile(game, difficulty):
+            return tile_position(game.player_tiles(0)[0])  # Where the human just placed
+
+        server.ai_action = occupied_tile
+        col, row = min(session.game.legal_actions())
+        reply = await asyncio.wait_for(server.handle_line(request(op="place", session=session.session_id,
+                                                                  col=col, row=row)), 5.0)
+        expect_equal("phase after an illegal AI action", "game_over", reply["state"]["phase"], 0, 4)
+        expect_equal("result after an illegal AI action", "ai_error", reply["state"]["result"], 0, 4)
+        expect_equal("illegal AI actions counted", 1, server.counters["ai_illegal_actions"], 0, 4)
+    finally:
+        server.pool.shutdown()
+    return {"requests": server.counters["requests"]}
+
+def check_server(seed: int = 1) -> dict:
+    """Rejected human actions charge the clock only once, and an illegal AI
+    action ends the game instead of asking the pool again forever"""
+    try:
+        return asyncio.run(server_requests(seed))
+    except asyncio.TimeoutError:
+        raise Mismatch("the request with an illegal AI action never finished")
+
+CHECKS = {"rules": check_rules, "vector": check_vector, "table": check_table, "server": check_server}
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Check Eat the Fish's engines against each other")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    rules = subcommands.add_parser("rules", help="GameState, CompactGame and Position over random games")
+    rules.add_argument("--games", type=int, default=300)
+    rules.add_argument("--seed", type=int, default=1)
+
+    vector = subcommands.add_parser("vector", help="VectorEnv against GameState, one game per board")
+    vector.add_argument("--boards", type=int, default=256)
+    vector.add_argument("--seed", type=int, default=1)
+
+    table = subcommands.add_parser("table", help="SharedTable against a dict table with the same slots")
+    table.add_argument("--games", type=int, default=3)
+    table.add_argument("--slots", type=int, default=1 << 14,
+                       help="table size, small so that slots are shared and overwritten")
+    table.add_argument("--seed", type=int, default=1)
+
+    server = subcommands.add_parser("server", help="GameServer with rejected requests and an illegal AI action")
+    server.add_argument("--seed", type=int, default=1)
+
+    args = parser.parse_args(argv)
+    options = {key: value for key, value in vars(args).items() if key != "command"}
+    started = time.perf_counter()
+    try:
+        summary = CHECKS[args.command](**options)
+    except Mismatch as mismatch:
+        print(json.dumps({"check": args.command, "ok": False, "error": str(mismatch)}))
+        sys.exit(1)
+    print(json.dumps({"check": args.command, "ok": True, **summary,
+                      "seconds": round(time.perf_counter() - started, 2)}))
+
+if __name__ == "__main__":
+    main()
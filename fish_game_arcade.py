@@ -1,25 +1,71 @@
 
-import arcade
 import os
+import time
+import importlib
+import threading
+
+STARTUP_STARTED = time.perf_counter()
+
+# Assets are found next to this file, whatever the working directory
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_PATH = os.path.join(ASSET_DIR, "fonts", "PressStart2P-Regular.ttf")
+
+class StartupPreloader:
+    """Imports modules and reads asset files on a background thread.
+
+    Started by main() before the window is created, so numpy and the font
+    load while the main thread spends its time in window creation.
+    """
+
+    def __init__(self, modules: tuple, assets: tuple):
+        self.assets = {}
+        self.thread = threading.Thread(target=self.run, args=(modules, assets), name="preload", daemon=True)
+        self.thread.start()
+
+    def run(self, modules: tuple, assets: tuple):
+        for path in assets:
+            try:
+                with open(path, "rb") as asset_file:
+                    self.assets[path] = asset_file.read()
+            except OSError:
+                pass  # The main thread reads it again and reports the error
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass  # Raised again where the module is actually used
+
+    def asset(self, path: str) -> bytes:
+        self.thread.join()
+        if path not in self.assets:
+            with open(path, "rb") as asset_file:
+                self.assets[path] = asset_file.read()
+        return self.assets[path]
+
+import arcade
+import pyglet
 import math
 import random
 import copy
-from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
-from enum import Enum
-import tkinter as tk
-from tkinter import font
+import argparse
+import sys
+from typing import Callable, List, Tuple, Optional, Dict
+
+np = None  # numpy, bound by load_numpy() on first use; tkinter is imported in show_game_over
+
+# Board layout and rules live in fish_rules so they can run without a window
+from fish_rules import (
+    BOARD_COLS, BOARD_ROWS, Penguin, GameRules
+)
+import fish_ai
+from fish_cache import DecisionCache, open_cache
+from fish_search import DEFAULT_DIFFICULTY, DIFFICULTY_LEVELS
 
 # Game constants
 SCREEN_WIDTH = 1400
 SCREEN_HEIGHT = 900
 SCREEN_TITLE = "Eat the Fish, ft. Pengu"
 
-# Board layout
-BOARD_COLS = 8
-BOARD_ROWS = 6
-TOTAL_TILES = BOARD_COLS * BOARD_ROWS
-
 # Hex tile constants
 HEX_RADIUS = 50
 HEX_WIDTH = HEX_RADIUS * 2
@@ -70,44 +116,130 @@ ACCENT_GLOW = (255, 215, 0, 80)      # Golden glow effect
 PARTICLE_GOLD = (255, 215, 0)        # Gold particles
 PARTICLE_BLUE = (30, 144, 255)       # Blue particles
 
-class FishCount(Enum):
-    ONE = 1
-    TWO = 2  
-    THREE = 3
-
-@dataclass
-class Tile:
-    col: int
-    row: int
-    fish_count: FishCount
-    has_penguin: bool = False
-    penguin_player: int = -1
-    exists: bool = True
-    # Enhanced animation properties
-    hover_scale: float = 1.0
-    selected_glow: float = 0.0
-    fish_animation_offset: float = 0.0
-    tile_variant: int = 0  # For color variety
-
-@dataclass
-class Penguin:
-    player_id: int
-    col: int
-    row: int
-    # Animation properties
-    bob_offset: float = 0.0
-    scale: float = 1.0
-    rotation: float = 0.0
-    happiness: float = 0.5  # For expression
+# Frame pacing
+FRAME_CAP = 60.0                     # Full frame rate while something is happening
+IDLE_FRAME_RATE = 12.0               # Low-power frame rate while waiting on the human
+IDLE_AFTER = 2.0                     # Seconds without input or events before idling
+
+# Fixed-timestep simulation
+SIMULATION_RATE = 30.0               # Logic steps per second, whatever the frame rate
+MAX_FRAME_TIME = 0.25                # A longer stall slows the game rather than running a burst of steps
+FOAM_RATE = 6.0                      # Foam particles per second
+# Drawing has its own generator so the number of frames drawn never changes the simulation
+draw_random = random.Random()
+
+def lerp(previous: float, current: float, alpha: float) -> float:
+    return previous + (current - previous) * alpha
+
+def load_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+# Started by main(); other importers such as fish_render read assets directly
+preloader: Optional[StartupPreloader] = None
+
+def read_asset(path: str) -> bytes:
+    if preloader is not None:
+        return preloader.asset(path)
+    with open(path, "rb") as asset_file:
+        return asset_file.read()
+
+class BoardAnimation:
+    """Animation state for all tiles and penguins, stored as NumPy arrays.
+
+    Tile arrays are indexed [row, col]; penguin arrays are indexed by the
+    penguin's position in FishGame.penguins. update() runs once per
+    simulation step and interpolate() once per drawn frame.
+    """
+
+    # Drawn as a blend of the last two simulation steps
+    INTERPOLATED = ("hover_scale", "selected_glow", "fish_animation_offset", "bob_offset", "scale")
+
+    def __init__(self, max_penguins: int):
+        load_numpy()
+        shape = (BOARD_ROWS, BOARD_COLS)
+        self.hover_scale = np.ones(shape)
+        self.selected_glow = np.zeros(shape)
+        self.fish_animation_offset = np.random.uniform(0, math.pi * 2, shape)
+        self.tile_variant = np.random.randint(0, 3, shape)  # For color variety
+
+        self.bob_offset = np.zeros(max_penguins)
+        self.scale = np.ones(max_penguins)
+        self.rotation = np.zeros(max_penguins)
+        self.happiness = np.full(max_penguins, 0.5)  # For expression
+
+        # Scratch masks rebuilt every frame from the UI state
+        self._hover_mask = np.zeros(shape, dtype=bool)
+        self._glow_mask = np.zeros(shape, dtype=bool)
+
+        self.previous = {name: getattr(self, name).copy() for name in self.INTERPOLATED}
+        self.drawn = {name: getattr(self, name).copy() for name in self.INTERPOLATED}
+
+    def place_penguin(self, index: int, bob_offset: float, happiness: float):
+        """Start a new penguin's animation without blending from the empty slot"""
+        self.bob_offset[index] = self.previous["bob_offset"][index] = bob_offset
+        self.scale[index] = self.previous["scale"][index] = 1.0
+        self.happiness[index] = happiness
+
+    def interpolate(self, alpha: float):
+        """Fill drawn with the state alpha of the way from the previous step to the last"""
+        for name, drawn in self.drawn.items():
+            previous = self.previous[name]
+            np.subtract(getattr(self, name), previous, out=drawn)
+            drawn *= alpha
+            drawn += previous
+
+    def update(self, delta_time: float, penguin_count: int,
+               valid_moves: List[Tuple[int, int]], selected: Optional[Tuple[int, int]]):
+        """Advance every tile and penguin animation with a few array operations"""
+        for name, previous in self.previous.items():
+            previous[...] = getattr(self, name)
+
+        self.fish_animation_offset += delta_time * 1.2
+
+        # Beautiful hover effect on reachable tiles
+        self._hover_mask[:] = False
+        for col, row in valid_moves:
+            self._hover_mask[row, col] = True
+        self.hover_scale = np.where(
+            self._hover_mask,
+            np.minimum(self.hover_scale + delta_time * 2.5, 1.08),
+            np.maximum(self.hover_scale - delta_time * 2.5, 1.0),
+        )
+
+        # Golden selection glow
+        self._glow_mask[:] = False
+        if selected:
+            self._glow_mask[selected[1], selected[0]] = True
+        self.selected_glow = np.where(
+            self._glow_mask,
+            np.minimum(self.selected_glow + delta_time * 4, 1.0),
+            np.maximum(self.selected_glow - delta_time * 4, 0.0),
+        )
+
+        # Penguin bobbing, happiness fades slowly
+        bob = self.bob_offset[:penguin_count]
+        bob += delta_time * 1.8
+        self.scale[:penguin_count] = 1.0 + np.sin(bob) * 0.04
+        happiness = self.happiness[:penguin_count]
+        np.maximum(happiness - delta_time * 0.1, 0.5, out=happiness)
 
 class ParticleEffect:
+    """A short-lived particle; velocities are in pixels per second"""
+
+    GRAVITY = 540.0      # Pixels per second squared
+    SPARKLE = 360.0      # Random horizontal acceleration of gold particles
+
     def __init__(self, x: float, y: float, color: Tuple[int, int, int], particle_type: str = "default"):
-        self.x = x
-        self.y = y
-        self.vel_x = random.uniform(-3, 3)
-        self.vel_y = random.uniform(2, 5)
+        self.x = self.previous_x = x
+        self.y = self.previous_y = y
+        self.vel_x = random.uniform(-180, 180)
+        self.vel_y = random.uniform(120, 300)
         self.color = color
-        self.life = 1.5
+        self.life = self.previous_life = 1.5
         self.max_life = self.life
         self.size = random.uniform(3, 6)
         self.particle_type = particle_type
@@ -115,33 +247,96 @@ class ParticleEffect:
         self.angle = 0
 
     def update(self, delta_time: float):
-        self.x += self.vel_x
-        self.y += self.vel_y
+        self.previous_x, self.previous_y, self.previous_life = self.x, self.y, self.life
+        self.x += self.vel_x * delta_time
+        self.y += self.vel_y * delta_time
         self.life -= delta_time
-        self.vel_y -= 0.15  # Gravity
+        self.vel_y -= self.GRAVITY * delta_time
         self.angle += self.spin * delta_time
 
         # Sparkle effect for gold particles
         if self.particle_type == "gold":
-            self.vel_x += random.uniform(-0.1, 0.1)
-
-    def draw(self):
-        if self.life > 0:
-            life_ratio = self.life / self.max_life
+            self.vel_x += random.uniform(-self.SPARKLE, self.SPARKLE) * delta_time
+
+    def draw(self, blend: float = 1.0):
+        """Draw between the last two simulation steps, blend of the way to the last"""
+        life = lerp(self.previous_life, self.life, blend)
+        if life > 0:
+            x = lerp(self.previous_x, self.x, blend)
+            y = lerp(self.previous_y, self.y, blend)
+            life_ratio = life / self.max_life
             alpha = int(life_ratio * 255)
             size = self.size * life_ratio
 
             if self.particle_type == "gold":
                 # Draw sparkling gold particle
-                arcade.draw_circle_filled(self.x, self.y, size, (*self.color, alpha))
-                arcade.draw_circle_filled(self.x, self.y, size * 0.5, (255, 255, 255, alpha // 2))
+                arcade.draw_circle_filled(x, y, size, (*self.color, alpha))
+                arcade.draw_circle_filled(x, y, size * 0.5, (255, 255, 255, alpha // 2))
             else:
-                arcade.draw_circle_filled(self.x, self.y, size, (*self.color, alpha))
-
-class AIPlayer:
+                arcade.draw_circle_filled(x, y, size, (*self.color, alpha))
+
+class FramePacer:
+    """Drops the window to a low-power frame rate while nothing is happening.
+
+    The game calls wake() on input and game events and update() every frame;
+    after IDLE_AFTER quiet seconds the update and draw rates fall to the idle
+    rate, and the next wake() restores the frame cap immediately.
+    """
+
+    def __init__(self, window: arcade.Window, frame_cap: float = FRAME_CAP,
+                 idle_rate: float = IDLE_FRAME_RATE, idle_after: float = IDLE_AFTER):
+        self.window = window
+        self.frame_cap = frame_cap
+        self.idle_rate = min(idle_rate, frame_cap)
+        self.idle_after = idle_after
+        self.quiet_time = 0.0
+        self.current_rate = frame_cap
+        self.time_at_rate: Dict[float, float] = {}
+        self.apply_rate(frame_cap)
+
+    @property
+    def idle(self) -> bool:
+        return self.current_rate != self.frame_cap
+
+    def apply_rate(self, rate: float):
+        self.current_rate = rate
+        # The update rate must change first: arcade never draws faster than it updates
+        self.window.set_update_rate(1 / rate)
+        self.window.set_draw_rate(1 / rate)
+
+    def wake(self):
+        self.quiet_time = 0.0
+        if self.idle:
+            self.apply_rate(self.frame_cap)
+
+    def update(self, delta_time: float, busy: bool):
+        self.time_at_rate[self.current_rate] = self.time_at_rate.get(self.current_rate, 0.0) + delta_time
+
+        if busy:
+            self.wake()
+            return
 
-    def __init__(self, player_id: int):
-        self.player_id = player_id
+        self.quiet_time += delta_time
+        if not self.idle and self.quiet_time >= self.idle_after:
+            self.apply_rate(self.idle_rate)
+
+    def report(self) -> str:
+        total = sum(self.time_at_rate.values()) or 1.0
+        lines = ["Frame pacing:"]
+        for rate, seconds in sorted(self.time_at_rate.items(), reverse=True):
+            label = "full" if rate == self.frame_cap else "idle"
+            lines.append(f"  {rate:5.1f} fps ({label}): {seconds:8.1f}s ({seconds / total:6.1%})")
+        return "\n".join(lines)
+
+class AIPlayer(fish_ai.AIPlayer):
+    """The headless AI plus its on-screen thinking particles"""
+
+    def __init__(self, player_id: int, difficulty: str = DEFAULT_DIFFICULTY, *,
+                 evaluation: str = fish_ai.DEFAULT_EVALUATION, search_workers: int = 1,
+                 cache: Optional[DecisionCache] = None, metrics: Optional[Callable[[dict], None]] = None,
+                 profile: bool = False, search_process: bool = False):
+        super().__init__(player_id, difficulty, evaluation=evaluation, search_workers=search_workers, cache=cache,
+                         metrics=metrics, profile=profile, search_process=search_process)
         self.thinking_particles = []
 
     def add_thinking_particle(self, x: float, y: float):
@@ -152,36 +347,11 @@ class AIPlayer:
         for particle in self.thinking_particles:
             particle.update(delta_time)
 
-    def draw_particles(self):
+    def draw_particles(self, blend: float = 1.0):
         for particle in self.thinking_particles:
-            particle.draw()
-
-    # [Previous AI logic methods remain the same]
-    def evaluate_move(self, game, from_col, from_row, to_col, to_row):
-        to_tile = game.get_tile(to_col, to_row)
-        if not to_tile:
-            return -1000
-
-        from_tile = game.get_tile(from_col, from_row)
-        score = from_tile.fish_count.value if from_tile else 0
-        score += to_tile.fish_count.value * 0.5
-
-        opponent_blocked = 0
-        for penguin in game.get_player_penguins(1 - self.player_id):
-            if game.can_reach(penguin.col, penguin.row, to_col, to_row):
-                opponent_blocked += 1
-        score += opponent_blocked * 2
-
-        center_col, center_row = BOARD_COLS // 2, BOARD_ROWS // 2
-        distance_from_center = abs(to_col - center_col) + abs(to_row - center_row)
-        score -= distance_from_center * 0.1
-
-        return score
+            particle.draw(blend)
 
     def get_best_move(self, game):
-        best_move = None
-        best_score = -1000
-
         for penguin in game.get_player_penguins(self.player_id):
             if random.random() < 0.2:  # Add thinking particles
                 center_x, center_y = game.get_tile_center(penguin.col, penguin.row)
@@ -190,64 +360,33 @@ class AIPlayer:
                     center_y + random.uniform(-25, 25)
                 )
 
-            valid_moves = game.get_valid_moves(penguin.col, penguin.row)
-
-            for to_col, to_row in valid_moves:
-                score = self.evaluate_move(game, penguin.col, penguin.row, to_col, to_row)
-
-                if score > best_score:
-                    best_score = score
-                    best_move = (penguin.col, penguin.row, to_col, to_row)
-
-        return best_move
-
-    def get_best_placement(self, game):
-        best_placement = None
-        best_score = -1000
-
-        for col in range(BOARD_COLS):
-            for row in range(BOARD_ROWS):
-                tile = game.get_tile(col, row)
-                if tile and not tile.has_penguin and tile.fish_count == FishCount.ONE:
-                    score = 0
+        return super().get_best_move(game)
 
-                    adjacent_count = 0
-                    for adj_col, adj_row in game.get_adjacent_positions(col, row):
-                        adj_tile = game.get_tile(adj_col, adj_row)
-                        if adj_tile and adj_tile.exists:
-                            adjacent_count += 1
-                            score += adj_tile.fish_count.value * 0.1
+class FishGame(arcade.Window, GameRules):
 
-                    score += adjacent_count
-
-                    center_col, center_row = BOARD_COLS // 2, BOARD_ROWS // 2
-                    distance_from_center = abs(col - center_col) + abs(row - center_row)
-                    score -= distance_from_center * 0.5
-
-                    if score > best_score:
-                        best_score = score
-                        best_placement = (col, row)
-
-        return best_placement
-
-class FishGame(arcade.Window):
-
-    def __init__(self):
-        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
+    def __init__(self, frame_cap: float = FRAME_CAP, idle_rate: float = IDLE_FRAME_RATE, *,
+                 difficulty: str = DEFAULT_DIFFICULTY, evaluation: str = fish_ai.DEFAULT_EVALUATION,
+                 search_workers: int = 1, search_process: bool = False, decision_cache: Optional[str] = None,
+                 ai_stats: bool = False, ai_metrics: Optional[Callable[[dict], None]] = None,
+                 simulation_rate: float = SIMULATION_RATE, measure_startup: bool = False):
+        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE,
+                         update_rate=1 / frame_cap, draw_rate=1 / frame_cap)
         arcade.set_background_color(WATER_COLOR)
-        font_path = os.path.join("fonts", "PressStart2P-Regular.ttf")
-        arcade.load_font(font_path)
+        pyglet.font.add_file(read_asset(FONT_PATH))
 
         # Game state
-        self.board: List[List[Optional[Tile]]] = []
-        self.penguins: List[Penguin] = []
-        self.current_player = 0
-        self.game_phase = "placement"
-        self.player_scores = [0, 0]
-        self.penguins_per_player = 4 # this is to change the minimum number of 1 penguins we need to choose
+        self.init_state()
+        # Built with the board in setup(), so numpy is not needed to open the window
+        self.animation: Optional[BoardAnimation] = None
 
         # AI
-        self.ai = AIPlayer(1)
+        cache = open_cache(decision_cache) if decision_cache else None
+        # With search_process TARS searches and ponders in a worker process, so
+        # pondering through the human's turn does not stall frames on the GIL
+        self.ai = AIPlayer(1, difficulty, evaluation=evaluation, search_workers=search_workers, cache=cache,
+                           metrics=ai_metrics, profile=ai_stats or ai_metrics is not None,
+                           search_process=search_process)
+        self.ai_stats = ai_stats
         self.ai_thinking = False
         self.ai_timer = 0.0
         self.ai_delay = 1.2
@@ -258,9 +397,19 @@ class FishGame(arcade.Window):
         self.status_message = ""
 
         # Animation state
-        self.time_elapsed = 0.0
+        self.time_elapsed = self.previous_time_elapsed = 0.0
         self.particles = []
-        self.water_animation_offset = 0.0
+        self.water_animation_offset = self.previous_water_offset = 0.0
+
+        # Fixed-timestep simulation: on_update runs whole steps of simulation_step
+        # seconds and on_draw blends the last two by the leftover simulation_lag
+        self.simulation_step = 1 / simulation_rate
+        self.simulation_lag = 0.0
+        self.frame_pacer = FramePacer(self, frame_cap, idle_rate)
+
+        # Startup measurement
+        self.measure_startup = measure_startup
+        self.first_frame_at: Optional[float] = None
 
         # Visual positioning
         self.board_start_x = SCREEN_WIDTH // 2 - (BOARD_COLS * HEX_RADIUS * 1.5) // 2
@@ -278,120 +427,92 @@ class FishGame(arcade.Window):
             bold=True
         )
 
+        # Styles are final here: every property set on a Text re-lays it out,
+        # so update_text_objects only ever touches the strings
         self.human_score_text = arcade.Text(
-            "", 15, SCREEN_HEIGHT - 90, PENGUIN_HUMAN_BASE, 15,
-            font_name="PressStart2P", bold=True
+            "", 15, SCREEN_HEIGHT - 90, (210, 180, 140), 15,
+            font_name="Press Start 2P", bold=True
         )
 
         self.ai_score_text = arcade.Text(
-            "", 15, SCREEN_HEIGHT - 125, PENGUIN_AI_BASE, 15,
-            font_name="PressStart2P", bold=True
+            "", 15, SCREEN_HEIGHT - 125, (100, 149, 237), 15,
+            font_name="Press Start 2P", bold=True
         )
 
         self.status_text = arcade.Text(
-            "", SCREEN_WIDTH // 2, 80, TEXT_PRIMARY, 25,
-            anchor_x="center", font_name="PressStart2P", bold=True
+            "", SCREEN_WIDTH / 2, 125, (255, 255, 255), 20,
+            anchor_x="center", font_name="Press Start 2P", bold=True
+        )
+
+        # Last TARS decision's search statistics, under the status line
+        self.ai_stats_text = arcade.Text(
+            "", SCREEN_WIDTH / 2, 100, (192, 192, 192), 12,
+            anchor_x="center", font_name="Courier New"
         )
 
         self.phase_text = arcade.Text(
-            "", SCREEN_WIDTH - 30, SCREEN_HEIGHT - 90, TEXT_ACCENT, 22,
-            anchor_x="right", font_name="PressStart2P", bold=True
+            "", self.width // 2, SCREEN_HEIGHT - 90, (0, 0, 0), 25,
+            anchor_x="center", anchor_y="bottom", font_name="Press Start 2P", bold=True
         )
 
         self.controls_text = arcade.Text(
-            "", SCREEN_WIDTH // 2, 50, TEXT_PRIMARY, 15,
-            anchor_x="center", font_name="PressStart2P"
+            "", self.width // 2, 40, (192, 192, 192), 14,
+            anchor_x="center", font_name="Courier New"
         )
 
     def setup(self):
         self.create_board()
         self.status_message = "Place the Penguins on 1-fish tiles!"
         self.update_text_objects()
+        self.ai.start_pondering(self)
+
+    @staticmethod
+    def set_text(text_object: arcade.Text, value: str):
+        if text_object.text != value:
+            text_object.text = value
+
+    def ai_stats_line(self) -> str:
+        metrics = self.ai.last_metrics
+        if metrics is None:
+            return ""
+        if metrics["cache_hit"]:
+            return f"TARS: cached depth {metrics['depth']} decision, score {metrics['score']:+.1f}"
+        line = (f"TARS: depth {metrics['depth']}, {metrics['nodes']} nodes, {metrics['nps'] / 1000:.1f}k nodes/s, "
+                f"{metrics['elapsed_ms']:.0f} ms")
+        if "branching" in metrics:
+            line += f", branching {metrics['branching']:.1f}, table hits {metrics['table_hit_rate']:.0%}"
+            if "movegen_ms" in metrics:
+                line += (f", movegen/eval/search {metrics['movegen_ms']:.0f}/{metrics['eval_ms']:.0f}"
+                         f"/{metrics['search_ms']:.0f} ms")
+            if metrics["margin"] is not None:
+                line += f", margin {metrics['margin']:+.1f}"
+        return line
 
     def update_text_objects(self):
-        self.human_score_text.text = f"human (Brown): {self.player_scores[0]} fish"
-        self.human_score_text.color = (210, 180, 140)
-        self.human_score_text.font_name = "Press Start 2P"
-
-        self.ai_score_text.text = f"TARS (Blue): {self.player_scores[1]} fish"
-        self.ai_score_text.color = (100, 149, 237)
-        self.ai_score_text.font_name = "Press Start 2P"
-        self.status_text.text = self.status_message
-        self.status_text.color = (255, 255, 255)
-        self.status_text.font_name = "Press Start 2P"
-        self.status_text.bold=True
-        self.status_text.font_size = 20 
-        self.status_text.anchor_x = "center"
-        self.status_text.x = SCREEN_WIDTH / 2
-        self.status_text.y = 125
-        
+        self.set_text(self.human_score_text, f"human (Brown): {self.player_scores[0]} fish")
+        self.set_text(self.ai_score_text, f"TARS (Blue): {self.player_scores[1]} fish")
+        self.set_text(self.status_text, self.status_message)
+        if self.ai_stats:
+            self.set_text(self.ai_stats_text, self.ai_stats_line())
 
         if self.game_phase == "placement":
-            self.phase_text.text = "PLACEMENT PHASE"
+            self.set_text(self.phase_text, "PLACEMENT PHASE")
         elif self.game_phase == "playing":
-            self.phase_text.text = "PLAYING PHASE"
+            self.set_text(self.phase_text, "PLAYING PHASE")
         elif self.game_phase == "game_over":
-            self.phase_text.text = "GAME OVER"
-
-        self.phase_text.color = (0, 0, 0)
-        self.phase_text.font_name = "Press Start 2P"
-        self.phase_text.font_size = 25
-        self.phase_text.x = self.width // 2
-        self.phase_text.anchor_x = "center"
-        self.phase_text.anchor_y = "bottom"
+            self.set_text(self.phase_text, "GAME OVER")
 
         if self.game_phase == "placement":
-            self.controls_text.text = "Click on 1-fish tiles to place the penguins"
+            self.set_text(self.controls_text, "Click on 1-fish tiles to place the penguins")
         elif self.game_phase == "playing":
-            self.controls_text.text = "Click the penguin, then click where to move"
+            self.set_text(self.controls_text, "Click the penguin, then click where to move")
         elif self.game_phase == "game_over":
-            self.controls_text.text = "Press R to restart"
-
-        self.controls_text.color = (192, 192, 192)
-        self.controls_text.font_name = "Courier New"
-        self.controls_text.font_size = 14
-        self.controls_text.x = self.width // 2
-        self.controls_text.y = 40
-        self.controls_text.anchor_x = "center"
+            self.set_text(self.controls_text, "Press R to restart")
 
     def create_board(self):
         """Create board with beautiful color variations"""
-        self.board = []
-        
-        fish_pattern = [
-            [1, 2, 3, 1, 2, 1, 3],
-            [2, 1, 1, 3, 1, 2, 2],
-            [1, 3, 2, 1, 3, 1, 2],
-            [3, 1, 1, 2, 1, 3, 1],
-            [2, 3, 2, 1, 2, 3, 1],
-            [1, 2, 3, 2, 1, 1, 3],
-            [3, 1, 2, 3, 1, 2, 1],
-            [2, 3, 1, 1, 2, 3, 2]
-        ]
-        # fish_pattern = [
-        #     [1,2],[2,1]
-        # ]
-
-
-
-        for row in range(BOARD_ROWS):
-            board_row = []
-            for col in range(BOARD_COLS):
-                fish_count_value = fish_pattern[row][col] if row < len(fish_pattern) and col < len(fish_pattern[row]) else random.choice([1, 1, 1, 2, 2, 3])
-                fish_count = FishCount(fish_count_value)
-
-                tile = Tile(col, row, fish_count)
-                tile.fish_animation_offset = random.uniform(0, math.pi * 2)
-                tile.tile_variant = random.randint(0, 2)  # For color variety
-                board_row.append(tile)
-
-            self.board.append(board_row)
-
-    # [Previous game logic methods remain the same]
-    def get_tile(self, col: int, row: int) -> Optional[Tile]:
-        if 0 <= col < BOARD_COLS and 0 <= row < BOARD_ROWS:
-            return self.board[row][col]
-        return None
+        super().create_board()
+        self.animation = BoardAnimation(self.penguins_per_player * 2)
 
     def get_tile_center(self, col: int, row: int) -> Tuple[float, float]:
         x_offset = HEX_RADIUS * 0.75 if row % 2 == 1 else 0
@@ -414,94 +535,12 @@ class FishGame(arcade.Window):
 
         return best_tile
 
-    def get_player_penguins(self, player_id: int) -> List[Penguin]:
-        return [p for p in self.penguins if p.player_id == player_id]
-
-    def get_penguin_at(self, col: int, row: int) -> Optional[Penguin]:
-        for penguin in self.penguins:
-            if penguin.col == col and penguin.row == row:
-                return penguin
-        return None
-
-    def get_adjacent_positions(self, col: int, row: int) -> List[Tuple[int, int]]:
-        adjacent = []
-        if row % 2 == 0:
-            offsets = [(-1, -1), (0, -1), (-1, 0), (1, 0), (-1, 1), (0, 1)]
-        else:
-            offsets = [(0, -1), (1, -1), (-1, 0), (1, 0), (0, 1), (1, 1)]
-
-        for dx, dy in offsets:
-            new_col, new_row = col + dx, row + dy
-            if 0 <= new_col < BOARD_COLS and 0 <= new_row < BOARD_ROWS:
-                adjacent.append((new_col, new_row))
-
-        return adjacent
-
-    def can_reach(self, from_col: int, from_row: int, to_col: int, to_row: int) -> bool:
-        if from_col == to_col and from_row == to_row:
-            return False
-
-        dx = to_col - from_col
-        dy = to_row - from_row
-        steps = max(abs(dx), abs(dy))
-        if steps == 0:
-            return False
-
-        step_x = dx / steps
-        step_y = dy / steps
-
-        for step in range(1, steps + 1):
-            check_col = from_col + round(step_x * step)
-            check_row = from_row + round(step_y * step)
-
-            tile = self.get_tile(check_col, check_row)
-            if not tile or not tile.exists:
-                return False
-
-            if step < steps and tile.has_penguin:
-                return False
-
-        return True
-
-    def get_valid_moves(self, col: int, row: int) -> List[Tuple[int, int]]:
-        valid_moves = []
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-
-        for dx, dy in directions:
-            distance = 1
-            while True:
-                new_col = col + dx * distance
-                new_row = row + dy * distance
-
-                if not (0 <= new_col < BOARD_COLS and 0 <= new_row < BOARD_ROWS):
-                    break
-
-                tile = self.get_tile(new_col, new_row)
-                if not tile or not tile.exists:
-                    break
-
-                # extra safeguard: stop if another penguin is on that tile
-                if any(p.col == new_col and p.row == new_row for p in self.penguins):
-                    break
-
-                valid_moves.append((new_col, new_row))
-                distance += 1
-
-        return valid_moves
-
-
     def place_penguin(self, col: int, row: int, player_id: int) -> bool:
-        tile = self.get_tile(col, row)
-        if not tile or tile.has_penguin or tile.fish_count != FishCount.ONE:
+        if not super().place_penguin(col, row, player_id):
             return False
 
-        penguin = Penguin(player_id, col, row)
-        penguin.bob_offset = random.uniform(0, math.pi * 2)
-        penguin.happiness = 0.8  # Happy to be placed!
-        self.penguins.append(penguin)
-
-        tile.has_penguin = True
-        tile.penguin_player = player_id
+        index = len(self.penguins) - 1
+        self.animation.place_penguin(index, random.uniform(0, math.pi * 2), 0.8)  # Happy to be placed!
 
         # Beautiful placement particles
         center_x, center_y = self.get_tile_center(col, row)
@@ -513,43 +552,37 @@ class FishGame(arcade.Window):
 
     def move_penguin(self, from_col: int, from_row: int, to_col: int, to_row: int) -> bool:
         from_tile = self.get_tile(from_col, from_row)
-        to_tile = self.get_tile(to_col, to_row)
-
-        if not from_tile or not to_tile or not from_tile.has_penguin:
+        index = self.get_penguin_index_at(from_col, from_row)
+        if not from_tile or index < 0:
             return False
 
-        penguin = self.get_penguin_at(from_col, from_row)
-        if not penguin:
+        fish_collected = from_tile.fish_count.value
+        if not super().move_penguin(from_col, from_row, to_col, to_row):
             return False
 
         # Collect fish with beautiful particles
-        fish_collected = from_tile.fish_count.value
-        self.player_scores[penguin.player_id] += fish_collected
-
         center_x, center_y = self.get_tile_center(from_col, from_row)
         for _ in range(fish_collected * 5):
             fish_colors = [FISH_CORAL, FISH_TURQUOISE, FISH_GOLD, FISH_SALMON]
             color = random.choice(fish_colors)
             self.particles.append(ParticleEffect(center_x, center_y, color, "gold"))
 
-        from_tile.exists = False
-        from_tile.has_penguin = False
+        happiness = self.animation.happiness
+        happiness[index] = min(happiness[index] + 0.2, 1.0)  # Happy after eating!
 
-        penguin.col = to_col
-        penguin.row = to_row
-        penguin.happiness = min(penguin.happiness + 0.2, 1.0)  # Happy after eating!
+        return True
 
-        to_tile.has_penguin = True
-        to_tile.penguin_player = penguin.player_id
+    def retire_stuck_penguins(self) -> List[Penguin]:
+        retired = super().retire_stuck_penguins()
 
-        return True
+        # The stuck penguin eats its last tile
+        for penguin in retired:
+            center_x, center_y = self.get_tile_center(penguin.col, penguin.row)
+            particle_color = PARTICLE_GOLD if penguin.player_id == 0 else PARTICLE_BLUE
+            for _ in range(12):
+                self.particles.append(ParticleEffect(center_x, center_y, particle_color, "gold"))
 
-    def check_game_over(self) -> bool:
-        player_penguins = self.get_player_penguins(self.current_player)
-        for penguin in player_penguins:
-            if self.get_valid_moves(penguin.col, penguin.row):
-                return False
-        return True
+        return retired
 
     def handle_placement_click(self, col: int, row: int):
         if self.current_player != 0:
@@ -563,8 +596,7 @@ class FishGame(arcade.Window):
                 self.current_player = 1
                 self.status_message = " TARS is selecting perfect position..."
             elif human_penguins >= self.penguins_per_player and ai_penguins >= self.penguins_per_player:
-                self.game_phase = "playing"
-                self.current_player = 0
+                self.start_playing()
                 self.status_message = "All set! Click the penguin to begin fishing!"
             else:
                 self.current_player = 1
@@ -580,7 +612,7 @@ class FishGame(arcade.Window):
 
         penguin = self.get_penguin_at(col, row)
 
-        if penguin and penguin.player_id == 0:
+        if penguin and penguin.player_id == 0 and self.get_tile(col, row).exists:
             self.selected_penguin = penguin
             self.valid_moves = self.get_valid_moves(col, row)
             self.status_message = f"Penguin ready! Choose the destination!"
@@ -589,12 +621,13 @@ class FishGame(arcade.Window):
                 self.selected_penguin = None
                 self.valid_moves = []
 
-                if self.check_game_over():
-                    self.game_phase = "game_over"
+                self.end_turn()
+                if self.game_phase == "game_over":
                     self.status_message = self.show_game_over()
-                else:
-                    self.current_player = 1
+                elif self.current_player == 1:
                     self.status_message = "TARS analyzing best fishing spots..."
+                else:
+                    self.status_message = "TARS is stuck! Fish again!"
         else:
             self.status_message = " Select the penguin first!"
 
@@ -614,6 +647,9 @@ class FishGame(arcade.Window):
             msg = f"It's a Tie!  \nScore: Player: {human_score} \nAI: {ai_score}"
             fg_color = "yellow"
 
+        import tkinter as tk
+        from tkinter import font
+
         root = tk.Tk()
         root.withdraw()  # hide main window
 
@@ -671,13 +707,13 @@ class FishGame(arcade.Window):
                 ai_penguins = len(self.get_player_penguins(1))
 
                 if human_penguins >= self.penguins_per_player and ai_penguins >= self.penguins_per_player:
-                    self.game_phase = "playing"
-                    self.current_player = 0
+                    self.start_playing()
                     self.status_message = " Perfect setup! Your turn to fish!"
                 else:
                     self.current_player = 0
                     self.status_message = "Your turn to place on golden tiles!"
 
+        self.ai.start_pondering(self)
         self.update_text_objects()
 
     def ai_make_move(self):
@@ -685,19 +721,34 @@ class FishGame(arcade.Window):
         if best_move:
             from_col, from_row, to_col, to_row = best_move
             if self.move_penguin(from_col, from_row, to_col, to_row):
-                if self.check_game_over():
-                    self.game_phase = "game_over"
+                self.end_turn()
+                if self.game_phase == "game_over":
                     self.status_message = self.show_game_over()
-                else:
-                    self.current_player = 0
+                elif self.current_player == 0:
                     self.status_message = "Your turn to make a brilliant move!"
+                else:
+                    self.status_message = "Your penguins are stuck! TARS fishes again..."
         else:
             self.game_phase = "game_over"
             self.status_message = self.show_game_over()
 
+        self.ai.start_pondering(self)
         self.update_text_objects()
 
+    def is_busy(self) -> bool:
+        """True while something other than ambient animation needs full frame rate"""
+        if self.ai_thinking or (self.current_player == 1 and self.game_phase != "game_over"):
+            return True
+        if self.ai.thinking_particles:
+            return True
+        # Ocean foam is ambient and never stops, so it does not keep the game awake
+        return any(p.particle_type != "foam" for p in self.particles)
+
+    def on_mouse_motion(self, x: int, y: int, dx: int, dy: int):
+        self.frame_pacer.wake()
+
     def on_mouse_press(self, x: int, y: int, button: int, modifiers: int):
+        self.frame_pacer.wake()
         if self.game_phase == "game_over":
             return
 
@@ -713,10 +764,43 @@ class FishGame(arcade.Window):
             self.handle_playing_click(col, row)
 
     def on_update(self, delta_time: float):
-        """Beautiful animations update"""
+        """Run the simulation steps this frame's share of time calls for"""
+        if self.measure_startup and self.first_frame_at is not None:
+            self.close()
+            return
+
+        self.advance(min(delta_time, MAX_FRAME_TIME))
+        self.frame_pacer.update(delta_time, self.is_busy())
+
+    def advance(self, seconds: float):
+        """Simulate seconds of game time in fixed steps. The outcome depends
+        only on the total time, not on how it is split into frames, so
+        headless drivers can call this directly to run faster than real time."""
+        self.simulation_lag += seconds
+        # The tolerance keeps frames that add up to a step, such as two at
+        # twice the simulation rate, from falling short by a rounding error
+        while self.simulation_lag >= self.simulation_step - 1e-9:
+            self.simulation_lag -= self.simulation_step
+            self.simulate(self.simulation_step)
+
+    @property
+    def blend(self) -> float:
+        """How far the drawn frame lies from the previous simulation step to the last"""
+        return min(max(self.simulation_lag / self.simulation_step, 0.0), 1.0)
+
+    def simulate(self, delta_time: float):
+        """One fixed simulation step: animations, particles and AI timing"""
+        self.previous_time_elapsed = self.time_elapsed
+        self.previous_water_offset = self.water_animation_offset
         self.time_elapsed += delta_time
         self.water_animation_offset += delta_time * 0.3
 
+        # Add foam effects
+        if random.random() < FOAM_RATE * delta_time:
+            foam_x = random.uniform(0, SCREEN_WIDTH)
+            foam_y = random.uniform(0, SCREEN_HEIGHT)
+            self.particles.append(ParticleEffect(foam_x, foam_y, (255, 255, 255), "foam"))
+
         # Update beautiful particles
         self.particles = [p for p in self.particles if p.life > 0]
         for particle in self.particles:
@@ -725,31 +809,11 @@ class FishGame(arcade.Window):
         # Update AI particles
         self.ai.update_particles(delta_time)
 
-        # Update penguin animations
-        for penguin in self.penguins:
-            penguin.bob_offset += delta_time * 1.8
-            penguin.scale = 1.0 + math.sin(penguin.bob_offset) * 0.04
-            penguin.happiness = max(penguin.happiness - delta_time * 0.1, 0.5)  # Happiness fades slowly
-
-        # Update tile animations
-        for row in self.board:
-            for tile in row:
-                if tile:
-                    tile.fish_animation_offset += delta_time * 1.2
-
-                    # Beautiful hover effect
-                    if (tile.col, tile.row) in self.valid_moves:
-                        tile.hover_scale = min(tile.hover_scale + delta_time * 2.5, 1.08)
-                    else:
-                        tile.hover_scale = max(tile.hover_scale - delta_time * 2.5, 1.0)
-
-                    # Golden selection glow
-                    if (self.selected_penguin and 
-                        self.selected_penguin.col == tile.col and 
-                        self.selected_penguin.row == tile.row):
-                        tile.selected_glow = min(tile.selected_glow + delta_time * 4, 1.0)
-                    else:
-                        tile.selected_glow = max(tile.selected_glow - delta_time * 4, 0.0)
+        # Update tile and penguin animations
+        selected = None
+        if self.selected_penguin:
+            selected = (self.selected_penguin.col, self.selected_penguin.row)
+        self.animation.update(delta_time, len(self.penguins), self.valid_moves, selected)
 
         # AI logic
         if self.ai_thinking:
@@ -765,17 +829,20 @@ class FishGame(arcade.Window):
         elif self.current_player == 1 and self.game_phase != "game_over":
             self.ai_thinking = True
             self.ai_timer = 0.0
+            # Search while the cosmetic delay runs; the move is applied once both are done
+            self.ai.start_search(self)
 
     def draw_beautiful_background(self):
         """Draw gorgeous animated ocean background"""
+        water_offset = lerp(self.previous_water_offset, self.water_animation_offset, self.blend)
         # Multi-layer water effect
         for layer in range(3):
             for i in range(0, SCREEN_HEIGHT, 15):
-                wave_offset = math.sin(self.water_animation_offset * (0.5 + layer * 0.3) + i * 0.008) * (8 + layer * 4)
+                wave_offset = math.sin(water_offset * (0.5 + layer * 0.3) + i * 0.008) * (8 + layer * 4)
                 color_base = [WATER_COLOR[j] for j in range(3)]
 
                 # Add shimmer
-                shimmer = 0.85 + 0.15 * math.sin(self.water_animation_offset * 2 + i * 0.02 + layer)
+                shimmer = 0.85 + 0.15 * math.sin(water_offset * 2 + i * 0.02 + layer)
                 for j in range(3):
                     color_base[j] = int(color_base[j] * shimmer)
 
@@ -783,28 +850,20 @@ class FishGame(arcade.Window):
                     wave_offset - 10, SCREEN_WIDTH, i , i+15,
                     tuple(color_base)
                 )
-                
 
-
-        # Add foam effects
-        if random.random() < 0.1:
-            foam_x = random.uniform(0, SCREEN_WIDTH)
-            foam_y = random.uniform(0, SCREEN_HEIGHT)
-            self.particles.append(ParticleEffect(foam_x, foam_y, (255, 255, 255), "foam"))
-
-    def get_tile_color(self, tile: Tile) -> Tuple[int, int, int]:
+    def get_tile_color(self, col: int, row: int) -> Tuple[int, int, int]:
         """Get beautiful tile color based on variant"""
         base_colors = [TILE_BASE, TILE_HONEY, TILE_BRONZE]
-        return base_colors[tile.tile_variant % len(base_colors)]
+        return base_colors[int(self.animation.tile_variant[row, col]) % len(base_colors)]
 
     def draw_gorgeous_hexagon(self, center_x: float, center_y: float, radius: float, 
-                             color: Tuple[int, int, int], tile: Tile):
+                             color: Tuple[int, int, int], hover_scale: float, selected_glow: float):
         """Draw hexagon with beautiful 3D gradient effect"""
         points = []
         for i in range(6):
             angle = math.pi / 3 * i + math.pi / 6
-            point_x = center_x + radius * math.cos(angle) * tile.hover_scale
-            point_y = center_y + radius * math.sin(angle) * tile.hover_scale
+            point_x = center_x + radius * math.cos(angle) * hover_scale
+            point_y = center_y + radius * math.sin(angle) * hover_scale
             points.append([point_x, point_y])
 
         # Beautiful shadow with soft edges
@@ -844,8 +903,8 @@ class FishGame(arcade.Window):
             arcade.draw_polygon_filled(shade_points, dark_color)
 
         # Golden selection glow
-        if tile.selected_glow > 0:
-            glow_intensity = tile.selected_glow
+        if selected_glow > 0:
+            glow_intensity = selected_glow
             glow_radius = radius * (1 + glow_intensity * 0.25)
             glow_points = []
             for i in range(6):
@@ -858,7 +917,7 @@ class FishGame(arcade.Window):
             arcade.draw_polygon_filled(glow_points, (*SELECTED_COLOR, glow_alpha))
 
         # Beautiful outline
-        outline_color = SELECTED_COLOR if tile.selected_glow > 0.5 else TILE_OUTLINE
+        outline_color = SELECTED_COLOR if selected_glow > 0.5 else TILE_OUTLINE
         arcade.draw_polygon_outline(points, outline_color, 3)
 
     def draw_beautiful_fish(self, center_x: float, center_y: float, scale: float, 
@@ -873,7 +932,7 @@ class FishGame(arcade.Window):
         tail_size = 6 * scale
 
         # Gradient body
-        main_color = random.choice(fish_colors)
+        main_color = draw_random.choice(fish_colors)
         arcade.draw_ellipse_filled(swim_x, swim_y, body_length, body_height, main_color)
 
         # Shimmer effect
@@ -912,12 +971,16 @@ class FishGame(arcade.Window):
             self.draw_beautiful_fish(center_x - 9, center_y - 5, 0.75, animation_offset + 0.8, fish_colors)
             self.draw_beautiful_fish(center_x + 9, center_y - 5, 0.75, animation_offset + 1.6, fish_colors)
 
-    def draw_gorgeous_penguin(self, center_x: float, center_y: float, penguin: Penguin):
+    def draw_gorgeous_penguin(self, center_x: float, center_y: float, index: int):
         """Draw penguin with beautiful details and animation"""
+        penguin = self.penguins[index]
+        bob_offset = float(self.animation.drawn["bob_offset"][index])
+        happiness = float(self.animation.happiness[index])
+
         # Enhanced bobbing animation
-        bob_y = center_y + math.sin(penguin.bob_offset) * 3.5
-        scale = penguin.scale
-        happiness_glow = penguin.happiness * 20
+        bob_y = center_y + math.sin(bob_offset) * 3.5
+        scale = float(self.animation.drawn["scale"][index])
+        happiness_glow = happiness * 20
 
         color_base = PENGUIN_HUMAN_BASE if penguin.player_id == 0 else PENGUIN_AI_BASE
         color_light = PENGUIN_HUMAN_LIGHT if penguin.player_id == 0 else PENGUIN_AI_LIGHT
@@ -967,7 +1030,7 @@ class FishGame(arcade.Window):
 
         # Beautiful eyes with shine and expression
         eye_size = 2.0 * scale
-        eye_happiness = 1.0 + penguin.happiness * 0.3
+        eye_happiness = 1.0 + happiness * 0.3
 
         # Eye whites
         arcade.draw_circle_filled(center_x - 3.5, head_y + 2, eye_size * eye_happiness, arcade.color.WHITE)
@@ -982,7 +1045,7 @@ class FishGame(arcade.Window):
         arcade.draw_circle_filled(center_x + 4, head_y + 2.5, eye_size * 0.4, arcade.color.WHITE)
 
         # Animated flippers
-        flipper_angle = math.sin(penguin.bob_offset * 1.8) * 0.3
+        flipper_angle = math.sin(bob_offset * 1.8) * 0.3
         flipper_color = tuple(max(0, c - 40) for c in color_base)
 
         # Left flipper
@@ -1009,6 +1072,9 @@ class FishGame(arcade.Window):
         self.draw_beautiful_background()
 
         # Draw tiles with beautiful effects
+        animation = self.animation
+        animation.interpolate(self.blend)
+        drawn = animation.drawn
         for row in range(BOARD_ROWS):
             for col in range(BOARD_COLS):
                 tile = self.board[row][col]
@@ -1016,41 +1082,49 @@ class FishGame(arcade.Window):
                     center_x, center_y = self.get_tile_center(col, row)
 
                     # Get beautiful tile color
-                    color = self.get_tile_color(tile)
+                    color = self.get_tile_color(col, row)
                     if (col, row) in self.valid_moves:
                         color = VALID_MOVE_COLOR
 
                     # Draw gorgeous hexagon
-                    self.draw_gorgeous_hexagon(center_x, center_y, HEX_RADIUS, color, tile)
+                    self.draw_gorgeous_hexagon(
+                        center_x, center_y, HEX_RADIUS, color,
+                        float(drawn["hover_scale"][row, col]), float(drawn["selected_glow"][row, col])
+                    )
 
                     # Draw beautiful fish
-                    self.draw_fish_symbols(center_x, center_y, tile.fish_count.value, tile.fish_animation_offset)
+                    self.draw_fish_symbols(
+                        center_x, center_y, tile.fish_count.value, float(drawn["fish_animation_offset"][row, col])
+                    )
 
                     # Draw gorgeous penguin if present
                     if tile.has_penguin:
-                        penguin = self.get_penguin_at(col, row)
-                        if penguin:
-                            self.draw_gorgeous_penguin(center_x, center_y, penguin)
+                        index = self.get_penguin_index_at(col, row)
+                        if index >= 0:
+                            self.draw_gorgeous_penguin(center_x, center_y, index)
 
         # Draw beautiful particles
+        blend = self.blend
         for particle in self.particles:
-            particle.draw()
+            particle.draw(blend)
 
         # Draw AI thinking particles
-        self.ai.draw_particles()
+        self.ai.draw_particles(blend)
 
         # Draw beautiful UI
         self.title_text.draw()
         self.human_score_text.draw()
         self.ai_score_text.draw()
         self.status_text.draw()
+        if self.ai_stats:
+            self.ai_stats_text.draw()
         self.phase_text.draw()
         self.controls_text.draw()
         
 
         # Victory celebration effect
         if self.game_phase == "game_over":
-            celebration_alpha = int(abs(math.sin(self.time_elapsed * 4)) * 40 + 20)
+            celebration_alpha = int(abs(math.sin(lerp(self.previous_time_elapsed, self.time_elapsed, self.blend) * 4)) * 40 + 20)
             color = (ACCENT_GLOW[0], ACCENT_GLOW[1], ACCENT_GLOW[2], celebration_alpha)
 
             arcade.draw_lrbt_rectangle_filled(
@@ -1062,11 +1136,12 @@ class FishGame(arcade.Window):
             )
             self.show_game_over()
 
-
-
+        if self.first_frame_at is None:
+            self.first_frame_at = time.perf_counter()
 
     def on_key_press(self, key, modifiers):
         """Handle key presses"""
+        self.frame_pacer.wake()
         if key == arcade.key.R or  self.game_phase == "game_over":
             self.setup()
         elif key == arcade.key.ESCAPE:
@@ -1074,9 +1149,68 @@ class FishGame(arcade.Window):
 
 def main():
     """Run the beautiful game"""
-    game = FishGame()
+    global preloader
+    preloader = StartupPreloader(("numpy",), (FONT_PATH,))
+
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument("--frame-cap", type=float, default=FRAME_CAP,
+                        help="frame rate while the game is active")
+    parser.add_argument("--idle-fps", type=float, default=IDLE_FRAME_RATE,
+                        help="low-power frame rate while waiting for input")
+    parser.add_argument("--sim-rate", type=float, default=SIMULATION_RATE,
+                        help="fixed game logic steps per second; frames in between are interpolated")
+    parser.add_argument("--difficulty", choices=list(DIFFICULTY_LEVELS), default=DEFAULT_DIFFICULTY,
+                        help="TARS search budget")
+    parser.add_argument("--evaluation", choices=fish_ai.EVALUATIONS, default=fish_ai.DEFAULT_EVALUATION,
+                        help="TARS position evaluation; learned needs tars_value.npz from fish_value.py")
+    parser.add_argument("--search-workers", type=int, default=1,
+                        help="processes searching each TARS move together (Lazy SMP)")
+    parser.add_argument("--search-in-thread", action="store_true",
+                        help="search and ponder on a thread of the game process instead of a worker process; "
+                             "saves the process but frames can stutter while TARS ponders")
+    parser.add_argument("--decision-cache", default=None, metavar="PATH",
+                        help="SQLite file caching TARS's decisions across games")
+    parser.add_argument("--ai-stats", action="store_true",
+                        help="show the last TARS decision's search statistics under the status line")
+    parser.add_argument("--ai-metrics", default=None, metavar="PATH",
+                        help="append every TARS decision's statistics as JSON lines to PATH (- for stderr)")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="report the time to the first frame, then exit")
+    args = parser.parse_args()
+
+    metrics_file = None
+    if args.ai_metrics == "-":
+        ai_metrics = fish_ai.json_lines_metrics(sys.stderr)
+    elif args.ai_metrics:
+        metrics_file = open(args.ai_metrics, "a")
+        ai_metrics = fish_ai.json_lines_metrics(metrics_file)
+    else:
+        ai_metrics = None
+
+    main_started = time.perf_counter()
+    game = FishGame(args.frame_cap, args.idle_fps, difficulty=args.difficulty, evaluation=args.evaluation,
+                    search_workers=args.search_workers, search_process=not args.search_in_thread,
+                    decision_cache=args.decision_cache,
+                    ai_stats=args.ai_stats, ai_metrics=ai_metrics, simulation_rate=args.sim_rate,
+                    measure_startup=args.measure_startup)
+    window_ready = time.perf_counter()
     game.setup()
+    setup_done = time.perf_counter()
     arcade.run()
+    game.ai.close()
+    if metrics_file is not None:
+        metrics_file.close()
+
+    if args.measure_startup:
+        first_frame = game.first_frame_at or time.perf_counter()
+        print("Startup (from module import):")
+        print(f"  imports:        {main_started - STARTUP_STARTED:7.3f}s")
+        print(f"  window:         {window_ready - main_started:7.3f}s")
+        print(f"  setup:          {setup_done - window_ready:7.3f}s")
+        print(f"  first frame:    {first_frame - setup_done:7.3f}s")
+        print(f"  time to frame:  {first_frame - STARTUP_STARTED:7.3f}s")
+    else:
+        print(game.frame_pacer.report())
 
 if __name__ == "__main__":
     main()
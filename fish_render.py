@@ -0,0 +1,333 @@
+"""Headless rendering of Eat the Fish games to image files or video, faster than real time.
+
+FishGame.on_draw renders into an offscreen framebuffer with no visible
+window. Each frame is read back into one of a ring of pixel buffers, so the
+GPU copy of frame n overlaps the rendering of frames n + 1 and n + 2. A
+thread pool flips, encodes and writes the frames while the main thread
+renders the next ones.
+
+    python fish_render.py --output clips/selfplay --difficulty medium --seed 4
+    python fish_render.py --record tars_games.jsonl --game 3 --format video --output game3.mp4
+    python fish_render.py --record tars_games.jsonl --every 0 --output snapshots/  # last frame only
+
+A record is one line of fish_value.py's recorded games; without one, the
+game is played out by TARS against itself.
+"""
+
+import os
+
+# Headless before arcade is imported: no window, no display needed
+os.environ.setdefault("ARCADE_HEADLESS", "1")
+
+import argparse
+import json
+import random
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, List, Optional, Tuple
+
+from PIL import Image
+from pyglet import gl
+
+import fish_game_arcade
+from fish_ai import AIPlayer as HeadlessAIPlayer
+from fish_rules import BoardSnapshot, GameState, tile_position
+from fish_search import DEFAULT_DIFFICULTY, DIFFICULTY_LEVELS, PLACE, Position
+
+FORMATS = ("png", "raw", "video")
+READBACK_RING = 3         # Frames between a readback starting and its pixels being used
+FRAMES_PER_WORKER = 2     # Frames queued per export thread before rendering waits
+HUMAN_DELAY = 0.8         # Game seconds the human side takes per action
+END_HOLD = 2.0            # Game seconds rendered after the game ends
+PNG_COMPRESS_LEVEL = 1    # zlib level; higher is smaller but much slower
+
+Action = Tuple[int, ...]
+
+class OffscreenGame(fish_game_arcade.FishGame):
+    """FishGame without the game-over popup"""
+
+    def show_game_over(self):
+        human, tars = self.player_scores
+        winner = "Player wins" if human > tars else "TARS wins" if tars > human else "It's a tie"
+        return f"{winner}! {human} : {tars}"
+
+class ReplayPlayer(fish_game_arcade.AIPlayer):
+    """Plays TARS's side from a shared queue of recorded actions"""
+
+    def __init__(self, actions: Deque[Action]):
+        super().__init__(1)
+        self.actions = actions
+
+    def get_best_placement(self, game):
+        return self.actions.popleft() if self.actions else None
+
+    def get_best_move(self, game):
+        return self.actions.popleft() if self.actions else None
+
+class OffscreenRenderer:
+    """Draws a window's on_draw into an offscreen framebuffer and reads
+    the pixels back asynchronously through a ring of pixel buffers"""
+
+    def __init__(self, window: fish_game_arcade.FishGame, ring: int = READBACK_RING):
+        self.window = window
+        self.ctx = window.ctx
+        self.size = window.get_framebuffer_size()
+        self.framebuffer = self.ctx.framebuffer(color_attachments=[self.ctx.texture(self.size, components=4)])
+        frame_bytes = self.size[0] * self.size[1] * 4
+        self.buffers = [self.ctx.buffer(reserve=frame_bytes, usage="stream") for _ in range(ring)]
+        self.in_flight: Deque = deque()
+        self.rendered = 0
+
+    def capture(self) -> Optional[bytes]:
+        """Render a frame and start its readback; returns the bottom-up RGBA
+        pixels of the frame rendered ring - 1 captures ago, or None at first"""
+        buffer = self.buffers[self.rendered % len(self.buffers)]
+        with self.framebuffer.activate():
+            self.framebuffer.clear(color=self.window.background_color)
+            self.window.on_draw()
+            gl.glReadBuffer(gl.GL_COLOR_ATTACHMENT0)
+            gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+            gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, buffer.glo)
+            # With a pack buffer bound the last argument is an offset, and the call returns at once
+            gl.glReadPixels(0, 0, *self.size, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, 0)
+            gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+        self.rendered += 1
+        self.in_flight.append(buffer)
+        if len(self.in_flight) < len(self.buffers):
+            return None
+        return self.in_flight.popleft().read()
+
+    def drain(self) -> List[bytes]:
+        """Pixels of the frames still being read back"""
+        frames = [buffer.read() for buffer in self.in_flight]
+        self.in_flight.clear()
+        return frames
+
+class FrameExporter:
+    """Encodes and writes frames on a thread pool while rendering goes on.
+
+    png and raw write one file per frame, top row first; video pipes the
+    frames in order to ffmpeg, which must be on PATH.
+    """
+
+    def __init__(self, output: str, size: Tuple[int, int], fmt: str = "png", fps: float = 30.0,
+                 workers: int = 4, compress_level: int = PNG_COMPRESS_LEVEL):
+        self.output = output
+        self.size = size
+        self.format = fmt
+        self.compress_level = compress_level
+        self.ffmpeg: Optional[subprocess.Popen] = None
+        if fmt == "video":
+            ffmpeg = shutil.which("ffmpeg")
+            if ffmpeg is None:
+                raise RuntimeError("video export needs ffmpeg on PATH; use --format png or raw")
+            self.ffmpeg = subprocess.Popen(
+                [ffmpeg, "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgba",
+                 "-s", f"{size[0]}x{size[1]}", "-r", str(fps), "-i", "-",
+                 "-vf", "vflip", "-pix_fmt", "yuv420p", output],
+                stdin=subprocess.PIPE,
+            )
+            workers = 1  # The pipe takes frames in order
+        else:
+            os.makedirs(output, exist_ok=True)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        self.slots = threading.Semaphore(workers * FRAMES_PER_WORKER)
+        self.error: Optional[BaseException] = None
+        self.frames = 0
+        self.wait_s = 0.0  # Rendering time lost waiting for the exporters
+
+    def submit(self, number: int, pixels: bytes):
+        if self.error is not None:
+            raise self.error
+        started = time.perf_counter()
+        self.slots.acquire()
+        self.wait_s += time.perf_counter() - started
+        self.pool.submit(self.write, number, pixels).add_done_callback(self.done)
+        self.frames += 1
+
+    def done(self, future):
+        self.slots.release()
+        if future.exception() is not None and self.error is None:
+            self.error = future.exception()
+
+    def write(self, number: int, pixels: bytes):
+        if self.ffmpeg is not None:
+            self.ffmpeg.stdin.write(pixels)
+            return
+        image = Image.frombytes("RGBA", self.size, pixels).transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+        path = os.path.join(self.output, f"frame_{number:06d}.{self.format}")
+        if self.format == "png":
+            image.save(path, compress_level=self.compress_level)
+        else:
+            with open(path, "wb") as f:
+                f.write(image.tobytes())
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        if self.ffmpeg is not None:
+            self.ffmpeg.stdin.close()
+            if self.ffmpeg.wait() != 0 and self.error is None:
+                self.error = RuntimeError(f"ffmpeg exited with status {self.ffmpeg.returncode}")
+        if self.error is not None:
+            raise self.error
+
+def recorded_actions(record: dict) -> Tuple[BoardSnapshot, List[Action]]:
+    """Opening snapshot and action list of a game recorded by fish_value.py"""
+    from fish_value import snapshot_from_json  # numpy is only needed for replays
+
+    snapshots = [snapshot_from_json(data) for data in record["positions"]]
+    actions: List[Action] = []
+    for before, after in zip(snapshots, snapshots[1:]):
+        if len(after.penguins) > len(before.penguins):
+            actions.append(tuple(after.penguins[-1][1:]))
+        else:
+            moved = next(i for i, (old, new) in enumerate(zip(before.penguins, after.penguins)) if old != new)
+            actions.append((*before.penguins[moved][1:], *after.penguins[moved][1:]))
+
+    # The record ends before the last action; it is the one giving the final scores
+    last = snapshots[-1]
+    for from_index, to_index in Position.from_game(GameState.from_snapshot(last)).legal_moves():
+        game = GameState.from_snapshot(last)
+        if from_index == PLACE:
+            action = tile_position(to_index)
+            game.play_placement(*action)
+        else:
+            action = (*tile_position(from_index), *tile_position(to_index))
+            game.play_move(*action)
+        if game.game_phase == "game_over" and list(game.player_scores) == list(record["scores"]):
+            actions.append(action)
+            break
+    return snapshots[0], actions
+
+class GameDriver:
+    """Plays the human side of an OffscreenGame, from a record or with TARS"""
+
+    def __init__(self, game: OffscreenGame, actions: Optional[Deque[Action]] = None,
+                 difficulty: str = DEFAULT_DIFFICULTY, human_delay: float = HUMAN_DELAY):
+        self.game = game
+        self.actions = actions
+        self.human = None if actions is not None else HeadlessAIPlayer(0, difficulty)
+        self.human_delay = human_delay
+        self.waited = 0.0
+        self.pending: Optional[Action] = None
+
+    def update(self, delta_time: float):
+        """Act for the human once their delay is up: pick the action halfway
+        (showing a selected penguin's moves), play it at the end"""
+        game = self.game
+        if game.current_player != 0 or game.game_phase not in ("placement", "playing"):
+            self.waited = 0.0
+            return
+        self.waited += delta_time
+        if self.pending is None and self.waited >= self.human_delay / 2:
+            self.pending = self.next_action()
+            if self.pending is None:
+                game.game_phase = "game_over"
+                game.status_message = game.show_game_over()
+                return
+            if len(self.pending) == 4:
+                game.handle_playing_click(*self.pending[:2])
+        if self.pending is not None and self.waited >= self.human_delay:
+            action, self.pending = self.pending, None
+            self.waited = 0.0
+            if len(action) == 2:
+                game.handle_placement_click(*action)
+            else:
+                game.handle_playing_click(*action[2:])
+
+    def next_action(self) -> Optional[Action]:
+        if self.human is not None:
+            return self.human.choose_action(self.game)
+        return self.actions.popleft() if self.actions else None
+
+def render_game(game: OffscreenGame, driver: GameDriver, exporter: FrameExporter, fps: float,
+                every: int = 1, max_seconds: float = 600.0) -> dict:
+    """Step the game 1 / fps of game time per frame until END_HOLD after
+    game over. Only exported frames are drawn: every every-th one, or with
+    every 0 just the last, e.g. for visual regression snapshots."""
+    renderer = OffscreenRenderer(game)
+    frame_time = 1 / fps
+    started = time.perf_counter()
+    frames = 0
+    held = 0.0
+    numbers: Deque[int] = deque()  # Frame numbers of the readbacks in flight
+
+    last_frame = False
+    while not last_frame:
+        driver.update(frame_time)
+        game.advance(frame_time)
+        if game.game_phase == "game_over":
+            held += frame_time
+        last_frame = held >= END_HOLD or (frames + 1) * frame_time >= max_seconds
+        if (frames % every == 0) if every else last_frame:
+            numbers.append(frames)
+            pixels = renderer.capture()
+            if pixels is not None:
+                exporter.submit(numbers.popleft(), pixels)
+        frames += 1
+    for pixels in renderer.drain():
+        exporter.submit(numbers.popleft(), pixels)
+
+    seconds = time.perf_counter() - started
+    return {"frames": frames, "exported": exporter.frames, "game_seconds": round(frames * frame_time, 2),
+            "seconds": round(seconds, 2), "speedup": round(frames * frame_time / seconds, 2),
+            "scores": list(game.player_scores)}
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Render an Eat the Fish game offscreen to frames or video")
+    parser.add_argument("--output", required=True, help="directory for png/raw frames, or the video file")
+    parser.add_argument("--format", choices=FORMATS, default="png",
+                        help="png or raw (RGBA, top row first) files per frame, or video through ffmpeg")
+    parser.add_argument("--record", default=None, metavar="PATH",
+                        help="JSON-lines file of games recorded by fish_value.py (default: TARS self-play)")
+    parser.add_argument("--game", type=int, default=0, help="line of --record to replay")
+    parser.add_argument("--difficulty", choices=list(DIFFICULTY_LEVELS), default=DEFAULT_DIFFICULTY,
+                        help="TARS's level on both sides in self-play")
+    parser.add_argument("--seed", type=int, default=None, help="board and particle seed")
+    parser.add_argument("--fps", type=float, default=30.0, help="frames per second of game time")
+    parser.add_argument("--sim-rate", type=float, default=fish_game_arcade.SIMULATION_RATE)
+    parser.add_argument("--every", type=int, default=1, help="export every n-th frame; 0 exports only the last")
+    parser.add_argument("--workers", type=int, default=4, help="export threads")
+    parser.add_argument("--compress-level", type=int, default=PNG_COMPRESS_LEVEL)
+    parser.add_argument("--max-seconds", type=float, default=600.0, help="game time rendered at most")
+    args = parser.parse_args(argv)
+    if args.format == "video" and shutil.which("ffmpeg") is None:
+        parser.error("video export needs ffmpeg on PATH; use --format png or raw")
+
+    if args.seed is not None:
+        random.seed(args.seed)
+        fish_game_arcade.load_numpy().random.seed(args.seed)
+
+    game = OffscreenGame(difficulty=args.difficulty, simulation_rate=args.sim_rate)
+    game.setup()
+    if args.record is not None:
+        with open(args.record) as f:
+            line = next(line for number, line in enumerate(f) if number == args.game)
+        opening, actions = recorded_actions(json.loads(line))
+        queue = deque(actions)
+        game.ai.close()
+        game.ai = ReplayPlayer(queue)
+        game.restore_snapshot(opening)
+        game.update_text_objects()
+        driver = GameDriver(game, queue)
+    else:
+        driver = GameDriver(game, difficulty=args.difficulty)
+
+    # A video of every n-th frame plays back at game speed
+    video_fps = args.fps / args.every if args.every else args.fps
+    exporter = FrameExporter(args.output, game.get_framebuffer_size(), args.format, video_fps,
+                             args.workers, args.compress_level)
+    try:
+        report = render_game(game, driver, exporter, args.fps, args.every, args.max_seconds)
+    finally:
+        exporter.close()
+        game.ai.close()
+    report["export_wait_s"] = round(exporter.wait_s, 2)
+    print(json.dumps(report))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,596 @@
+"""Headless Eat the Fish rules, shared by the arcade window, the AI and the server."""
+
+import random
+from dataclasses import dataclass
+from enum import Enum
+from typing import List, NamedTuple, Optional, Tuple
+
+# Board layout
+BOARD_COLS = 8
+BOARD_ROWS = 6
+TOTAL_TILES = BOARD_COLS * BOARD_ROWS
+
+FISH_PATTERN = [
+    [1, 2, 3, 1, 2, 1, 3],
+    [2, 1, 1, 3, 1, 2, 2],
+    [1, 3, 2, 1, 3, 1, 2],
+    [3, 1, 1, 2, 1, 3, 1],
+    [2, 3, 2, 1, 2, 3, 1],
+    [1, 2, 3, 2, 1, 1, 3],
+    [3, 1, 2, 3, 1, 2, 1],
+    [2, 3, 1, 1, 2, 3, 2]
+]
+
+# Straight-line move directions as (col, row) steps
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+def tile_index(col: int, row: int) -> int:
+    return row * BOARD_COLS + col
+
+def tile_position(index: int) -> Tuple[int, int]:
+    return index % BOARD_COLS, index // BOARD_COLS
+
+def _build_rays() -> List[Tuple[Tuple[int, ...], ...]]:
+    """For every tile, the tiles along each move direction in order of distance"""
+    rays = []
+    for index in range(TOTAL_TILES):
+        col, row = tile_position(index)
+        tile_rays = []
+        for dx, dy in DIRECTIONS:
+            ray = []
+            new_col, new_row = col + dx, row + dy
+            while 0 <= new_col < BOARD_COLS and 0 <= new_row < BOARD_ROWS:
+                ray.append(tile_index(new_col, new_row))
+                new_col, new_row = new_col + dx, new_row + dy
+            tile_rays.append(tuple(ray))
+        rays.append(tuple(tile_rays))
+    return rays
+
+RAYS = _build_rays()
+
+def _build_lines() -> List[List[Optional[Tuple[int, int]]]]:
+    """LINES[a][b] is (direction, distance) when tile b lies on one of a's rays"""
+    lines = [[None] * TOTAL_TILES for _ in range(TOTAL_TILES)]
+    for index, tile_rays in enumerate(RAYS):
+        for direction, ray in enumerate(tile_rays):
+            for distance, target in enumerate(ray, 1):
+                lines[index][target] = (direction, distance)
+    return lines
+
+LINES = _build_lines()
+
+class FishCount(Enum):
+    ONE = 1
+    TWO = 2
+    THREE = 3
+
+@dataclass(slots=True)
+class Tile:
+    """Game logic state of a tile; animation lives in BoardAnimation"""
+    col: int
+    row: int
+    fish_count: FishCount
+    has_penguin: bool = False
+    penguin_player: int = -1
+    exists: bool = True
+
+@dataclass(slots=True)
+class Penguin:
+    """Game logic state of a penguin; animation lives in BoardAnimation"""
+    player_id: int
+    col: int
+    row: int
+
+class BoardSnapshot(NamedTuple):
+    """Compact copy of the logic state, cheap to hand to AI workers and replays"""
+    fish: bytes  # fish count per tile in row-major order, 0 for removed tiles
+    penguins: Tuple[Tuple[int, int, int], ...]  # (player_id, col, row) in placement order
+    scores: Tuple[int, int]
+    current_player: int
+    game_phase: str
+
+class GameRules:
+    """Board state and move rules, independent of any window.
+
+    Used as a mixin by FishGame and by the headless GameState, so the AI can
+    query either one through the same methods.
+    """
+
+    def init_state(self, penguins_per_player: int = 4):
+        self.board: List[List[Optional[Tile]]] = []
+        self.penguins: List[Penguin] = []
+        self.current_player = 0
+        self.game_phase = "placement"
+        self.player_scores = [0, 0]
+        self.penguins_per_player = penguins_per_player # this is to change the minimum number of 1 penguins we need to choose
+        # Reachable tiles per direction for each penguin, kept in step with
+        # every placement and move so mobility never needs move generation
+        self.move_reach: List[List[int]] = []
+
+    def create_board(self):
+        self.board = []
+        for row in range(BOARD_ROWS):
+            board_row = []
+            for col in range(BOARD_COLS):
+                fish_count_value = FISH_PATTERN[row][col] if row < len(FISH_PATTERN) and col < len(FISH_PATTERN[row]) else random.choice([1, 1, 1, 2, 2, 3])
+                board_row.append(Tile(col, row, FishCount(fish_count_value)))
+
+            self.board.append(board_row)
+        self.move_reach = [self.scan_reach(p.col, p.row) for p in self.penguins]
+
+    def snapshot(self) -> BoardSnapshot:
+        fish = bytes(
+            tile.fish_count.value if tile.exists else 0
+            for board_row in self.board for tile in board_row
+        )
+        return BoardSnapshot(
+            fish,
+            tuple((p.player_id, p.col, p.row) for p in self.penguins),
+            (self.player_scores[0], self.player_scores[1]),
+            self.current_player,
+            self.game_phase,
+        )
+
+    def restore_snapshot(self, snapshot: BoardSnapshot):
+        self.create_board()
+        for tile, fish in zip((t for board_row in self.board for t in board_row), snapshot.fish):
+            if fish:
+                tile.fish_count = FishCount(fish)
+            else:
+                tile.exists = False
+
+        self.penguins = []
+        for player_id, col, row in snapshot.penguins:
+            self.penguins.append(Penguin(player_id, col, row))
+            tile = self.get_tile(col, row)
+            if tile.exists:  # Retired penguins stand on sunk tiles
+                tile.has_penguin = True
+                tile.penguin_player = player_id
+
+        self.player_scores = list(snapshot.scores)
+        self.current_player = snapshot.current_player
+        self.game_phase = snapshot.game_phase
+        self.move_reach = [self.scan_reach(p.col, p.row) for p in self.penguins]
+
+    def get_tile(self, col: int, row: int) -> Optional[Tile]:
+        if 0 <= col < BOARD_COLS and 0 <= row < BOARD_ROWS:
+            return self.board[row][col]
+        return None
+
+    def get_player_penguins(self, player_id: int) -> List[Penguin]:
+        return [p for p in self.penguins if p.player_id == player_id]
+
+    def get_penguin_at(self, col: int, row: int) -> Optional[Penguin]:
+        for penguin in self.penguins:
+            if penguin.col == col and penguin.row == row:
+                return penguin
+        return None
+
+    def get_penguin_index_at(self, col: int, row: int) -> int:
+        for index, penguin in enumerate(self.penguins):
+            if penguin.col == col and penguin.row == row:
+                return index
+        return -1
+
+    def get_adjacent_positions(self, col: int, row: int) -> List[Tuple[int, int]]:
+        adjacent = []
+        if row % 2 == 0:
+            offsets = [(-1, -1), (0, -1), (-1, 0), (1, 0), (-1, 1), (0, 1)]
+        else:
+            offsets = [(0, -1), (1, -1), (-1, 0), (1, 0), (0, 1), (1, 1)]
+
+        for dx, dy in offsets:
+            new_col, new_row = col + dx, row + dy
+            if 0 <= new_col < BOARD_COLS and 0 <= new_row < BOARD_ROWS:
+                adjacent.append((new_col, new_row))
+
+        return adjacent
+
+    def can_reach(self, from_col: int, from_row: int, to_col: int, to_row: int) -> bool:
+        if from_col == to_col and from_row == to_row:
+            return False
+
+        dx = to_col - from_col
+        dy = to_row - from_row
+        steps = max(abs(dx), abs(dy))
+        if steps == 0:
+            return False
+
+        step_x = dx / steps
+        step_y = dy / steps
+
+        for step in range(1, steps + 1):
+            check_col = from_col + round(step_x * step)
+            check_row = from_row + round(step_y * step)
+
+            tile = self.get_tile(check_col, check_row)
+            if not tile or not tile.exists:
+                return False
+
+            if step < steps and tile.has_penguin:
+                return False
+
+        return True
+
+    def scan_reach(self, col: int, row: int) -> List[int]:
+        """Count reachable tiles along each direction by walking the rays"""
+        occupied = {tile_index(p.col, p.row) for p in self.penguins}
+        reach = []
+        for ray in RAYS[tile_index(col, row)]:
+            distance = 0
+            for target in ray:
+                tile = self.board[target // BOARD_COLS][target % BOARD_COLS]
+                if not tile.exists or target in occupied:
+                    break
+                distance += 1
+            reach.append(distance)
+        return reach
+
+    def block_rays(self, col: int, row: int):
+        """A tile just became occupied: cut every ray that reached it"""
+        blocked = tile_index(col, row)
+        for penguin, reach in zip(self.penguins, self.move_reach):
+            line = LINES[tile_index(penguin.col, penguin.row)][blocked]
+            if line is not None and line[1] <= reach[line[0]]:
+                reach[line[0]] = line[1] - 1
+
+    def penguin_mobility(self, index: int) -> int:
+        return sum(self.move_reach[index])
+
+    def player_mobility(self, player_id: int) -> int:
+        return sum(
+            sum(reach) for penguin, reach in zip(self.penguins, self.move_reach)
+            if penguin.player_id == player_id
+        )
+
+    def get_valid_moves(self, col: int, row: int) -> List[Tuple[int, int]]:
+        index = self.get_penguin_index_at(col, row)
+        if index >= 0:
+            return [
+                tile_position(target)
+                for ray, distance in zip(RAYS[tile_index(col, row)], self.move_reach[index])
+                for target in ray[:distance]
+            ]
+
+        valid_moves = []
+
+        for dx, dy in DIRECTIONS:
+            distance = 1
+            while True:
+                new_col = col + dx * distance
+                new_row = row + dy * distance
+
+                if not (0 <= new_col < BOARD_COLS and 0 <= new_row < BOARD_ROWS):
+                    break
+
+                tile = self.get_tile(new_col, new_row)
+                if not tile or not tile.exists:
+                    break
+
+                # extra safeguard: stop if another penguin is on that tile
+                if any(p.col == new_col and p.row == new_row for p in self.penguins):
+                    break
+
+                valid_moves.append((new_col, new_row))
+                distance += 1
+
+        return valid_moves
+
+    def place_penguin(self, col: int, row: int, player_id: int) -> bool:
+        tile = self.get_tile(col, row)
+        if not tile or tile.has_penguin or tile.fish_count != FishCount.ONE:
+            return False
+
+        self.block_rays(col, row)
+        self.penguins.append(Penguin(player_id, col, row))
+        self.move_reach.append(self.scan_reach(col, row))
+        tile.has_penguin = True
+        tile.penguin_player = player_id
+        return True
+
+    def move_penguin(self, from_col: int, from_row: int, to_col: int, to_row: int) -> bool:
+        from_tile = self.get_tile(from_col, from_row)
+        to_tile = self.get_tile(to_col, to_row)
+
+        if not from_tile or not to_tile or not from_tile.has_penguin:
+            return False
+
+        index = self.get_penguin_index_at(from_col, from_row)
+        if index < 0:
+            return False
+        penguin = self.penguins[index]
+
+        self.player_scores[penguin.player_id] += from_tile.fish_count.value
+
+        # The vacated tile sinks, and it was already blocking every other
+        # penguin's rays, so only rays through the destination change
+        from_tile.exists = False
+        from_tile.has_penguin = False
+
+        penguin.col = to_col
+        penguin.row = to_row
+
+        to_tile.has_penguin = True
+        to_tile.penguin_player = penguin.player_id
+
+        self.block_rays(to_col, to_row)
+        self.move_reach[index] = self.scan_reach(to_col, to_row)
+
+        return True
+
+    def retire_stuck_penguins(self) -> List[Penguin]:
+        """Credit the tile under every penguin that can no longer move and sink it"""
+        retired = []
+        for index, penguin in enumerate(self.penguins):
+            tile = self.board[penguin.row][penguin.col]
+            if tile.exists and self.penguin_mobility(index) == 0:
+                self.player_scores[penguin.player_id] += tile.fish_count.value
+                tile.exists = False
+                tile.has_penguin = False
+                retired.append(penguin)
+        return retired
+
+    def check_game_over(self) -> bool:
+        """The game ends once no penguin of either player can move"""
+        return not any(any(reach) for reach in self.move_reach)
+
+    def end_turn(self) -> List[Penguin]:
+        """After a move: retire stuck penguins, then pass the turn, let the
+        mover go again if the opponent is stuck, or end the game.
+
+        Returns the penguins retired by this move.
+        """
+        retired = self.retire_stuck_penguins()
+        if self.check_game_over():
+            self.game_phase = "game_over"
+        elif self.player_mobility(1 - self.current_player):
+            self.current_player = 1 - self.current_player
+        return retired
+
+    def start_playing(self):
+        """Placement is complete: the human moves first unless stuck already"""
+        self.game_phase = "playing"
+        self.current_player = 1
+        self.end_turn()
+
+class GameState(GameRules):
+    """A complete game without a window, advancing turns the same way FishGame does"""
+
+    def __init__(self, penguins_per_player: int = 4):
+        self.init_state(penguins_per_player)
+        self.create_board()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: BoardSnapshot, penguins_per_player: int = 4) -> "GameState":
+        state = cls(penguins_per_player)
+        state.restore_snapshot(snapshot)
+        return state
+
+    def play_placement(self, col: int, row: int) -> bool:
+        """Place a penguin for the side to move and pass the turn"""
+        if self.game_phase != "placement" or not self.place_penguin(col, row, self.current_player):
+            return False
+
+        placed = [len(self.get_player_penguins(player)) for player in (0, 1)]
+        if min(placed) >= self.penguins_per_player:
+            self.start_playing()
+        elif placed[1 - self.current_player] < self.penguins_per_player:
+            self.current_player = 1 - self.current_player
+        return True
+
+    def play_move(self, from_col: int, from_row: int, to_col: int, to_row: int) -> bool:
+        """Move one of the side to move's penguins and pass the turn"""
+        if self.game_phase != "playing":
+            return False
+
+        penguin = self.get_penguin_at(from_col, from_row)
+        if not penguin or penguin.player_id != self.current_player:
+            return False
+        if (to_col, to_row) not in self.get_valid_moves(from_col, from_row):
+            return False
+
+        self.move_penguin(from_col, from_row, to_col, to_row)
+        self.end_turn()
+        return True
+
+    def resign(self):
+        """End the game when the side to move has nothing to play"""
+        self.game_phase = "game_over"
+
+    def winner(self) -> int:
+        """Winning player id, or -1 for a tie"""
+        human_score, ai_score = self.player_scores
+        if human_score == ai_score:
+            return -1
+        return 0 if human_score > ai_score else 1
+
+# First tile of every ray from each tile: a penguin can move iff one is free
+NEIGHBOR_MASKS = [sum(1 << ray[0] for ray in tile_rays if ray) for tile_rays in RAYS]
+
+PHASES = ("placement", "playing", "game_over")
+PENGUIN_BITS = 6    # Tile index per penguin slot
+SLOTS_PER_PLAYER = 8
+SCORE_BITS = 9      # Room for every fish on the board
+
+class CompactGame:
+    """GameState's rules over three packed ints, for hosting many games at once.
+
+    fish holds 2 bits per tile (0 once the tile has sunk), penguins a tile
+    index per slot (player 1's slots start at SLOTS_PER_PLAYER) and state the
+    scores, penguins placed per player, side to move, phase and penguins per
+    player. A game costs a few hundred bytes instead of a GameState's 48
+    Tile objects.
+    """
+    __slots__ = ("fish", "penguins", "state")
+
+    def __init__(self, penguins_per_player: int = 4):
+        if not 1 <= penguins_per_player <= SLOTS_PER_PLAYER - 1:
+            raise ValueError(f"penguins_per_player must be 1..{SLOTS_PER_PLAYER - 1}")
+        fish = 0
+        for index in range(TOTAL_TILES):
+            col, row = tile_position(index)
+            count = FISH_PATTERN[row][col] if col < len(FISH_PATTERN[row]) else random.choice([1, 1, 1, 2, 2, 3])
+            fish |= count << 2 * index
+        self.fish = fish
+        self.penguins = 0
+        self.state = 0
+        self.pack(0, 0, 0, 0, 0, 0, penguins_per_player)
+
+    # --- Packing ----------------------------------------------------------
+
+    def pack(self, score0: int, score1: int, placed0: int, placed1: int, side: int, phase: int, per_player: int):
+        self.state = (score0 | score1 << SCORE_BITS | placed0 << 18 | placed1 << 21 | side << 24 | phase << 25
+                      | per_player << 27)
+
+    def unpack(self) -> List[int]:
+        state = self.state
+        mask = (1 << SCORE_BITS) - 1
+        return [state & mask, state >> SCORE_BITS & mask, state >> 18 & 7, state >> 21 & 7, state >> 24 & 1,
+                state >> 25 & 3, state >> 27 & 7]
+
+    def fish_at(self, index: int) -> int:
+        return self.fish >> 2 * index & 3
+
+    def player_tiles(self, player: int) -> List[int]:
+        placed = self.state >> (18 if player == 0 else 21) & 7
+        base = player * SLOTS_PER_PLAYER
+        return [self.penguins >> PENGUIN_BITS * (base + slot) & 63 for slot in range(placed)]
+
+    def alive_mask(self) -> int:
+        fish = self.fish
+        return sum(1 << index for index in range(TOTAL_TILES) if fish >> 2 * index & 3)
+
+    def occupied_mask(self) -> int:
+        mask = 0
+        for player in (0, 1):
+            for index in self.player_tiles(player):
+                mask |= 1 << index
+        return mask
+
+    # --- GameState interface ----------------------------------------------
+
+    @property
+    def current_player(self) -> int:
+        return self.state >> 24 & 1
+
+    @property
+    def game_phase(self) -> str:
+        return PHASES[self.state >> 25 & 3]
+
+    @game_phase.setter
+    def game_phase(self, phase: str):
+        self.state = self.state & ~(3 << 25) | PHASES.index(phase) << 25
+
+    @property
+    def player_scores(self) -> Tuple[int, int]:
+        mask = (1 << SCORE_BITS) - 1
+        return self.state & mask, self.state >> SCORE_BITS & mask
+
+    def snapshot(self) -> BoardSnapshot:
+        return BoardSnapshot(
+            bytes(self.fish_at(index) for index in range(TOTAL_TILES)),
+            tuple((player, *tile_position(index)) for player in (0, 1) for index in self.player_tiles(player)),
+            self.player_scores,
+            self.current_player,
+            self.game_phase,
+        )
+
+    def valid_targets(self, index: int, free: int) -> List[int]:
+        targets = []
+        for ray in RAYS[index]:
+            for target in ray:
+                if not free >> target & 1:
+                    break
+                targets.append(target)
+        return targets
+
+    def legal_actions(self) -> List[Tuple[int, ...]]:
+        """Placements (col, row) or moves (from_col, from_row, to_col, to_row) for the side to move"""
+        phase = self.state >> 25 & 3
+        free = self.alive_mask() & ~self.occupied_mask()
+        if phase == 0:
+            return [tile_position(index) for index in range(TOTAL_TILES)
+                    if free >> index & 1 and self.fish_at(index) == 1]
+        if phase == 1:
+            return [(*tile_position(index), *tile_position(target))
+                    for index in self.player_tiles(self.current_player) if self.fish_at(index)
+                    for target in self.valid_targets(index, free)]
+        return []
+
+    def play_placement(self, col: int, row: int) -> bool:
+        """Place a penguin for the side to move and pass the turn"""
+        score0, score1, placed0, placed1, side, phase, per_player = self.unpack()
+        if phase != 0 or not (0 <= col < BOARD_COLS and 0 <= row < BOARD_ROWS):
+            return False
+        index = tile_index(col, row)
+        if self.fish_at(index) != 1 or self.occupied_mask() >> index & 1:
+            return False
+
+        placed = [placed0, placed1]
+        self.penguins |= index << PENGUIN_BITS * (side * SLOTS_PER_PLAYER + placed[side])
+        placed[side] += 1
+        if min(placed) >= per_player:
+            # GameRules.start_playing: the human opens unless stuck already
+            self.pack(score0, score1, placed[0], placed[1], 1, 1, per_player)
+            self.end_turn()
+        else:
+            if placed[1 - side] < per_player:
+                side = 1 - side
+            self.pack(score0, score1, placed[0], placed[1], side, 0, per_player)
+        return True
+
+    def play_move(self, from_col: int, from_row: int, to_col: int, to_row: int) -> bool:
+        """Move one of the side to move's penguins and pass the turn"""
+        if self.state >> 25 & 3 != 1:
+            return False
+        side = self.current_player
+        from_index, to_index = tile_index(from_col, from_row), tile_index(to_col, to_row)
+        tiles = self.player_tiles(side)
+        if from_index not in tiles or not self.fish_at(from_index):
+            return False
+        if to_index not in self.valid_targets(from_index, self.alive_mask() & ~self.occupied_mask()):
+            return False
+
+        shift = PENGUIN_BITS * (side * SLOTS_PER_PLAYER + tiles.index(from_index))
+        self.penguins = self.penguins & ~(63 << shift) | to_index << shift
+        self.credit(side, from_index)
+        self.end_turn()
+        return True
+
+    def credit(self, player: int, index: int):
+        """Score the fish on a tile for player and sink it"""
+        score0, score1, *rest = self.unpack()
+        scores = [score0, score1]
+        scores[player] += self.fish_at(index)
+        self.fish &= ~(3 << 2 * index)
+        self.pack(*scores, *rest)
+
+    def end_turn(self):
+        """GameRules.end_turn: retire stuck penguins, then pass the turn, let
+        the mover go again, or end the game"""
+        free = self.alive_mask() & ~self.occupied_mask()
+        can_move = [False, False]
+        for player in (0, 1):
+            for index in self.player_tiles(player):
+                if not self.fish_at(index):
+                    continue  # Retired earlier
+                if NEIGHBOR_MASKS[index] & free:
+                    can_move[player] = True
+                else:
+                    self.credit(player, index)
+
+        if not any(can_move):
+            self.game_phase = "game_over"
+        elif can_move[1 - self.current_player]:
+            self.state ^= 1 << 24
+
+    def resign(self):
+        """End the game when the side to move has nothing to play"""
+        self.game_phase = "game_over"
+
+    def winner(self) -> int:
+        """Winning player id, or -1 for a tie"""
+        human_score, ai_score = self.player_scores
+        if human_score == ai_score:
+            return -1
+        return 0 if human_score > ai_score else 1
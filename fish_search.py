@@ -0,0 +1,592 @@
+"""Anytime alpha-beta search for TARS over a compact bitboard position.
+
+Tiles are numbered row * BOARD_COLS + col. A position keeps the remaining
+tiles as one int bitmask and each player's penguins as a tuple of tile
+indices, so copying and hashing a position is cheap.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fish_rules import BOARD_COLS, DIRECTIONS, LINES, RAYS, TOTAL_TILES, GameRules, tile_index, tile_position
+
+Move = Tuple[int, int]  # (from_index, to_index); from_index is PLACE for placements
+PLACE = -1
+
+WIN_BONUS = 1000.0
+
+# Evaluation weights for non-terminal positions
+MOBILITY_WEIGHT = 0.1        # Per legal move more than the opponent
+REACHABLE_FISH_WEIGHT = 0.1  # Per fish within one move, more than the opponent
+TERRITORY_WEIGHT = 0.5       # Per fish on tiles reached first, more than the opponent
+
+_ray_fish_cache: Dict[Tuple[int, ...], List[Tuple[Tuple[int, ...], ...]]] = {}
+
+def ray_fish_prefix(fish: Tuple[int, ...]) -> List[Tuple[Tuple[int, ...], ...]]:
+    """prefix[tile][direction][n] is the fish on the first n tiles of that ray"""
+    prefix = _ray_fish_cache.get(fish)
+    if prefix is None:
+        prefix = []
+        for tile_rays in RAYS:
+            sums = []
+            for ray in tile_rays:
+                running = [0]
+                for target in ray:
+                    running.append(running[-1] + fish[target])
+                sums.append(tuple(running))
+            prefix.append(tuple(sums))
+        if len(_ray_fish_cache) > 64:
+            _ray_fish_cache.clear()
+        _ray_fish_cache[fish] = prefix
+    return prefix
+
+def scan_reach(index: int, tiles: int, occupied: int) -> Tuple[int, ...]:
+    """Reachable tiles along each direction from index"""
+    reach = []
+    for ray in RAYS[index]:
+        distance = 0
+        for target in ray:
+            bit = 1 << target
+            if not tiles & bit or occupied & bit:
+                break
+            distance += 1
+        reach.append(distance)
+    return tuple(reach)
+
+def block_reach(penguins: Tuple[Tuple[int, ...], Tuple[int, ...]], reach: List[List[Tuple[int, ...]]], blocked: int):
+    """Cut every penguin's ray that reached the newly occupied tile, in place"""
+    for player in (0, 1):
+        player_reach = reach[player]
+        for slot, index in enumerate(penguins[player]):
+            line = LINES[index][blocked]
+            if line is not None:
+                direction, distance = line
+                penguin_reach = player_reach[slot]
+                if distance <= penguin_reach[direction]:
+                    cut = list(penguin_reach)
+                    cut[direction] = distance - 1
+                    player_reach[slot] = tuple(cut)
+
+class Position:
+    """Immutable search position; apply() returns a new one.
+
+    Like GameRules, a position carries each penguin's reach per direction and
+    updates it incrementally, so mobility and legal moves need no ray walks.
+    """
+    __slots__ = ("fish", "fish_key", "ray_fish", "tiles", "penguins", "reach", "scores", "side", "placing",
+                 "over", "penguins_per_player")
+
+    def __init__(self, fish: Tuple[int, ...], tiles: int, penguins: Tuple[Tuple[int, ...], Tuple[int, ...]],
+                 reach: Tuple[Tuple[Tuple[int, ...], ...], Tuple[Tuple[int, ...], ...]],
+                 scores: Tuple[int, int], side: int, placing: bool, over: bool, penguins_per_player: int = 4,
+                 fish_key: Optional[int] = None):
+        self.fish = fish
+        # Hash of the board's fish layout, computed once per game and handed down by apply()
+        self.fish_key = hash(fish) if fish_key is None else fish_key
+        self.ray_fish = ray_fish_prefix(fish)
+        self.tiles = tiles
+        self.penguins = penguins
+        self.reach = reach
+        self.scores = scores
+        self.side = side
+        self.placing = placing
+        self.over = over
+        self.penguins_per_player = penguins_per_player
+
+    @classmethod
+    def from_game(cls, game: GameRules) -> "Position":
+        fish = []
+        tiles = 0
+        for board_row in game.board:
+            for tile in board_row:
+                fish.append(tile.fish_count.value)
+                if tile.exists:
+                    tiles |= 1 << tile_index(tile.col, tile.row)
+
+        penguins = tuple(
+            tuple(tile_index(p.col, p.row) for p in game.get_player_penguins(player))
+            for player in (0, 1)
+        )
+        occupied = 0
+        for index in penguins[0] + penguins[1]:
+            occupied |= 1 << index
+        reach = tuple(tuple(scan_reach(index, tiles, occupied) for index in penguins[player]) for player in (0, 1))
+        return cls(
+            tuple(fish), tiles, penguins, reach, (game.player_scores[0], game.player_scores[1]),
+            game.current_player, game.game_phase == "placement", game.game_phase == "game_over",
+            game.penguins_per_player,
+        )
+
+    def key(self) -> Tuple:
+        """Transposition key; scores enter only as the difference that evaluation sees.
+        The fish layout is part of it since tables outlive a game and boards differ."""
+        return (self.fish_key, self.tiles, self.penguins, self.side, self.placing, self.scores[0] - self.scores[1])
+
+    def occupied(self) -> int:
+        mask = 0
+        for player_penguins in self.penguins:
+            for index in player_penguins:
+                mask |= 1 << index
+        return mask
+
+    def legal_moves(self) -> List[Move]:
+        if self.over:
+            return []
+        if self.placing:
+            fish = self.fish
+            occupied = self.occupied()
+            return [
+                (PLACE, index) for index in range(TOTAL_TILES)
+                if fish[index] == 1 and self.tiles >> index & 1 and not occupied >> index & 1
+            ]
+        side = self.side
+        return [
+            (index, target)
+            for index, penguin_reach in zip(self.penguins[side], self.reach[side])
+            for ray, distance in zip(RAYS[index], penguin_reach)
+            for target in ray[:distance]
+        ]
+
+    def mobility(self, player: int) -> Tuple[int, int]:
+        """Number of legal moves and fish on the tiles they reach"""
+        ray_fish = self.ray_fish
+        moves = reach_fish = 0
+        for index, penguin_reach in zip(self.penguins[player], self.reach[player]):
+            prefix = ray_fish[index]
+            for direction, distance in enumerate(penguin_reach):
+                if distance:
+                    moves += distance
+                    reach_fish += prefix[direction][distance]
+        return moves, reach_fish
+
+    def apply(self, move: Move) -> "Position":
+        from_index, to_index = move
+        side = self.side
+        penguins = list(self.penguins)
+        reach = [list(self.reach[0]), list(self.reach[1])]
+        block_reach(self.penguins, reach, to_index)
+
+        if from_index == PLACE:
+            penguins[side] = penguins[side] + (to_index,)
+            reach[side].append(scan_reach(to_index, self.tiles, self.occupied() | 1 << to_index))
+            position = Position(self.fish, self.tiles, tuple(penguins), (tuple(reach[0]), tuple(reach[1])),
+                                self.scores, side, True, False, self.penguins_per_player, self.fish_key)
+            placed = (len(penguins[0]), len(penguins[1]))
+            if min(placed) >= self.penguins_per_player:
+                # Same as GameRules.start_playing: the human opens unless stuck
+                position.placing = False
+                position.side = 1
+                position.end_turn()
+            elif placed[1 - side] < self.penguins_per_player:
+                position.side = 1 - side
+            return position
+
+        slot = penguins[side].index(from_index)
+        penguins[side] = penguins[side][:slot] + (to_index,) + penguins[side][slot + 1:]
+        tiles = self.tiles & ~(1 << from_index)
+        occupied = self.occupied() & ~(1 << from_index) | 1 << to_index
+        reach[side][slot] = scan_reach(to_index, tiles, occupied)
+
+        scores = list(self.scores)
+        scores[side] += self.fish[from_index]
+        position = Position(self.fish, tiles, tuple(penguins), (tuple(reach[0]), tuple(reach[1])),
+                            tuple(scores), side, False, False, self.penguins_per_player, self.fish_key)
+        position.end_turn()
+        return position
+
+    def end_turn(self):
+        """Same as GameRules.end_turn: retire stuck penguins, then pass the
+        turn, let the mover go again, or end the game"""
+        tiles = self.tiles
+        scores = None
+        any_moves = [False, False]
+        for player in (0, 1):
+            for index, penguin_reach in zip(self.penguins[player], self.reach[player]):
+                if any(penguin_reach):
+                    any_moves[player] = True
+                elif tiles >> index & 1:
+                    if scores is None:
+                        scores = list(self.scores)
+                    scores[player] += self.fish[index]
+                    tiles &= ~(1 << index)
+        if scores is not None:
+            self.scores = tuple(scores)
+            self.tiles = tiles
+
+        if not any_moves[0] and not any_moves[1]:
+            self.over = True
+        elif any_moves[1 - self.side]:
+            self.side = 1 - self.side
+
+def evaluate(position: Position, player: int, mobility_weight: float = MOBILITY_WEIGHT,
+             reachable_fish_weight: float = REACHABLE_FISH_WEIGHT) -> float:
+    """Static value of a position for player"""
+    other = 1 - player
+    score_diff = position.scores[player] - position.scores[other]
+    if position.over:
+        if score_diff:
+            return score_diff + (WIN_BONUS if score_diff > 0 else -WIN_BONUS)
+        return 0.0
+
+    my_moves, my_fish = position.mobility(player)
+    their_moves, their_fish = position.mobility(other)
+    return (score_diff
+            + mobility_weight * (my_moves - their_moves)
+            + reachable_fish_weight * (my_fish - their_fish))
+
+# slide_targets can fill two boards at once, the second shifted up by
+# PAIR_SHIFT bits; the gap is wider than any shift, so they never mix
+PAIR_SHIFT = 128
+BOARD_MASK = (1 << TOTAL_TILES) - 1
+
+def _build_slides() -> List[Tuple[int, int]]:
+    """(shift, mask) per direction: shifting a tile bitmask by shift moves
+    every tile one step, and mask drops the tiles that wrapped across a row"""
+    slides = []
+    for dx, dy in DIRECTIONS:
+        mask = 0
+        for index in range(TOTAL_TILES):
+            if 0 <= tile_position(index)[0] - dx < BOARD_COLS:
+                mask |= 1 << index
+        slides.append((dy * BOARD_COLS + dx, mask | mask << PAIR_SHIFT))
+    return slides
+
+SLIDES = _build_slides()
+
+# Slides towards higher and lower tile indices as (shift, 2 * shift, 4 * shift, mask)
+_UP_SLIDES = [(shift, 2 * shift, 4 * shift, mask) for shift, mask in SLIDES if shift > 0]
+_DOWN_SLIDES = [(-shift, -2 * shift, -4 * shift, mask) for shift, mask in SLIDES if shift < 0]
+
+def slide_targets(sources: int, free: int) -> int:
+    """Tiles one straight move away from any tile in sources, moving over free tiles.
+
+    A Kogge-Stone fill per direction: runs of free tiles double in length
+    with each shift, so three shifts cover the longest ray.
+    """
+    targets = 0
+    for one, two, four, mask in _UP_SLIDES:
+        empty = free & mask
+        fill = sources | empty & sources << one
+        run = empty & empty << one
+        fill |= run & fill << two
+        fill |= run & run << two & fill << four
+        targets |= empty & fill << one
+    for one, two, four, mask in _DOWN_SLIDES:
+        empty = free & mask
+        fill = sources | empty & sources >> one
+        run = empty & empty >> one
+        fill |= run & fill >> two
+        fill |= run & run >> two & fill >> four
+        targets |= empty & fill >> one
+    return targets
+
+_fish_mask_cache: Dict[Tuple[int, ...], Tuple[int, int, int]] = {}
+
+def fish_masks(fish: Tuple[int, ...]) -> Tuple[int, int, int]:
+    """Bitmasks of the tiles holding one, two and three fish"""
+    masks = _fish_mask_cache.get(fish)
+    if masks is None:
+        counts = [0, 0, 0]
+        for index, count in enumerate(fish):
+            if count:
+                counts[count - 1] |= 1 << index
+        masks = tuple(counts)
+        if len(_fish_mask_cache) > 64:
+            _fish_mask_cache.clear()
+        _fish_mask_cache[fish] = masks
+    return masks
+
+def territory(position: Position) -> Tuple[int, int]:
+    """Fish on the tiles each player's penguins can reach in fewer moves
+    than the opponent's, counting the tiles they stand on.
+
+    A breadth-first search from all penguins at once, one move per layer,
+    on tile bitmasks; tiles both sides reach in the same number of moves
+    belong to neither.
+    """
+    tiles = position.tiles
+    standing = [0, 0]
+    for player in (0, 1):
+        for index in position.penguins[player]:
+            standing[player] |= 1 << index
+    first = standing[0] & tiles  # Retired penguins stand on sunk tiles
+    second = standing[1] & tiles
+    free = tiles & ~(standing[0] | standing[1])
+
+    # Both players' layers advance together as one PAIR_SHIFT-packed bitmask
+    owned = [first, second]
+    free |= free << PAIR_SHIFT
+    unseen = free
+    frontier = first | second << PAIR_SHIFT
+    while frontier:
+        frontier = slide_targets(frontier, free) & unseen
+        mine, theirs = frontier & BOARD_MASK, frontier >> PAIR_SHIFT
+        reached = mine | theirs
+        unseen &= ~(reached | reached << PAIR_SHIFT)
+        owned[0] |= mine & ~theirs
+        owned[1] |= theirs & ~mine
+
+    ones, twos, threes = fish_masks(position.fish)
+    return tuple(
+        (mask & ones).bit_count() + 2 * (mask & twos).bit_count() + 3 * (mask & threes).bit_count()
+        for mask in owned
+    )
+
+def evaluate_territory(position: Position, player: int, territory_weight: float = TERRITORY_WEIGHT) -> float:
+    """Static value of a position for player from the fish each side controls"""
+    other = 1 - player
+    score_diff = position.scores[player] - position.scores[other]
+    if position.over:
+        if score_diff:
+            return score_diff + (WIN_BONUS if score_diff > 0 else -WIN_BONUS)
+        return 0.0
+
+    owned = territory(position)
+    return score_diff + territory_weight * (owned[player] - owned[other])
+
+@dataclass(frozen=True)
+class SearchBudget:
+    """Limits for one decision; whichever runs out first ends the search"""
+    max_depth: int
+    max_nodes: int
+    max_time_ms: float
+
+# Difficulty levels; "classic" is the original one-ply greedy heuristic
+DIFFICULTY_LEVELS: Dict[str, Optional[SearchBudget]] = {
+    "classic": None,
+    "easy": SearchBudget(max_depth=1, max_nodes=2_000, max_time_ms=50),
+    "medium": SearchBudget(max_depth=3, max_nodes=15_000, max_time_ms=250),
+    "hard": SearchBudget(max_depth=6, max_nodes=60_000, max_time_ms=1_000),
+    "expert": SearchBudget(max_depth=30, max_nodes=250_000, max_time_ms=3_000),
+}
+DEFAULT_DIFFICULTY = "classic"
+
+# How often the clock is read, in nodes; bounds the overshoot past max_time_ms
+TIME_CHECK_INTERVAL = 128
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+class SearchAborted(Exception):
+    """Raised inside the search when the budget runs out"""
+
+@dataclass
+class SearchTelemetry:
+    """Where one search spent its effort"""
+    expanded: int = 0          # Nodes whose moves were generated
+    children: int = 0          # Moves generated at those nodes
+    evaluations: int = 0
+    table_probes: int = 0
+    table_hits: int = 0
+    profiled: bool = False     # movegen_s and eval_s are only measured by profiling engines
+    movegen_s: float = 0.0
+    eval_s: float = 0.0
+    margin: Optional[float] = None  # Best root score minus the runner-up's, a lower bound
+
+@dataclass
+class SearchResult:
+    move: Optional[Move]
+    score: float
+    depth: int
+    nodes: int
+    elapsed_ms: float
+    ponder_hit: bool = False
+    cache_hit: bool = False
+    telemetry: Optional[SearchTelemetry] = None
+
+class SearchEngine:
+    """Iterative-deepening negamax with alpha-beta and a transposition table.
+
+    The search is anytime: when the budget runs out it returns the best move
+    of the deepest completed iteration, improved by any root move of the
+    interrupted iteration that already beat it. Node, evaluation and table
+    counters are always kept; with profile the time spent in move generation
+    and evaluation is measured too, at a cost of several percent in nodes/s.
+    """
+
+    def __init__(self, evaluator: Callable[[Position, int], float] = evaluate, max_table_size: int = 200_000,
+                 batch_evaluator: Optional[Callable[[List[Position], int], List[float]]] = None, table=None,
+                 profile: bool = False):
+        self.evaluator = evaluator
+        # Scores all children of a frontier node at once, e.g. LinearValue.evaluate_batch
+        self.batch_evaluator = batch_evaluator
+        self.max_table_size = max_table_size
+        # Any mapping with get() and item assignment, e.g. fish_smp.SharedTable
+        self.table: Dict[Tuple, Tuple[int, int, float, Optional[Move]]] = {} if table is None else table
+        self.first_depth = 1  # Lazy SMP helpers start deeper so workers spread across depths
+        self.profile = profile
+        self.telemetry = SearchTelemetry()
+        self.root_margin: Optional[float] = None
+        self.nodes = 0
+        self.node_limit = 0
+        self.deadline = 0.0
+        self.stop: Optional[threading.Event] = None
+
+    def search(self, position: Position, budget: SearchBudget,
+               stop: Optional[threading.Event] = None) -> SearchResult:
+        """Search within budget; setting stop aborts early like an exhausted budget"""
+        started = time.perf_counter()
+        self.deadline = started + budget.max_time_ms / 1000
+        self.nodes = 0
+        self.node_limit = budget.max_nodes
+        self.stop = stop
+        self.telemetry = telemetry = SearchTelemetry(profiled=self.profile)
+        self.root_margin = None
+        if isinstance(self.table, dict) and len(self.table) > self.max_table_size:
+            self.table.clear()
+
+        moves = position.legal_moves()
+        if not moves:
+            return SearchResult(None, self.evaluator(position, position.side), 0, 0, 0.0, telemetry=telemetry)
+
+        best_move, best_score, depth_reached = moves[0], float("-inf"), 0
+        for depth in range(min(self.first_depth, budget.max_depth), budget.max_depth + 1):
+            try:
+                score, move = self.search_root(position, moves, depth, best_move)
+            except SearchAborted as aborted:
+                # The previous best move is searched first, so any partial
+                # result already accounts for it at the deeper depth
+                partial_score, partial_move = aborted.args
+                if partial_move is not None:
+                    best_move, best_score = partial_move, partial_score
+                break
+            best_move, best_score, depth_reached = move, score, depth
+            telemetry.margin = self.root_margin
+            if abs(score) >= WIN_BONUS:
+                break  # Proven result; deeper search cannot change it
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return SearchResult(best_move, best_score, depth_reached, self.nodes, elapsed_ms, telemetry=telemetry)
+
+    def search_root(self, position: Position, moves: List[Move], depth: int,
+                    first: Optional[Move]) -> Tuple[float, Move]:
+        if depth == 1 and self.batch_evaluator is not None:
+            values = self.frontier_values(position, moves)
+            best = max(range(len(moves)), key=values.__getitem__)
+            runner_up = max((value for i, value in enumerate(values) if i != best), default=None)
+            self.root_margin = None if runner_up is None else values[best] - runner_up
+            return values[best], moves[best]
+
+        ordered = self.order_moves(position, moves, first)
+        alpha, beta = float("-inf"), float("inf")
+        best_move = None
+        # Moves after the first fail low, so their scores only bound the
+        # runner-up from above and the margin is a lower bound
+        runner_up = float("-inf")
+        for move in ordered:
+            try:
+                score = self.child_value(position, move, depth - 1, -beta, -alpha)
+            except SearchAborted:
+                raise SearchAborted(alpha, best_move)
+            if score > alpha:
+                if best_move is not None:
+                    runner_up = alpha
+                alpha, best_move = score, move
+            elif score > runner_up:
+                runner_up = score
+        self.root_margin = alpha - runner_up if runner_up > float("-inf") else None
+        return alpha, best_move
+
+    def child_value(self, position: Position, move: Move, depth: int, alpha: float, beta: float) -> float:
+        child = position.apply(move)
+        # Placement can give the same side two turns in a row, and a finished
+        # game keeps the mover as side, so only negate when the side changes
+        if child.side == position.side:
+            return self.negamax(child, depth, alpha, beta)
+        return -self.negamax(child, depth, -beta, -alpha)
+
+    def negamax(self, position: Position, depth: int, alpha: float, beta: float) -> float:
+        self.nodes += 1
+        if self.nodes >= self.node_limit:
+            raise SearchAborted(None, None)
+        if self.nodes % TIME_CHECK_INTERVAL == 0 and (
+            time.perf_counter() > self.deadline or (self.stop is not None and self.stop.is_set())
+        ):
+            raise SearchAborted(None, None)
+
+        if depth <= 0 or position.over:
+            return self.evaluate_leaf(position)
+
+        telemetry = self.telemetry
+        key = position.key()
+        entry = self.table.get(key)
+        table_move = None
+        telemetry.table_probes += 1
+        if entry is not None:
+            telemetry.table_hits += 1
+            entry_depth, bound, value, table_move = entry
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return value
+                if bound == LOWER and value >= beta:
+                    return value
+                if bound == UPPER and value <= alpha:
+                    return value
+
+        if self.profile:
+            started = time.perf_counter()
+            moves = position.legal_moves()
+            telemetry.movegen_s += time.perf_counter() - started
+        else:
+            moves = position.legal_moves()
+        telemetry.expanded += 1
+        telemetry.children += len(moves)
+        if not moves:
+            return self.evaluate_leaf(position)
+        if depth == 1 and self.batch_evaluator is not None:
+            return max(self.frontier_values(position, moves))
+
+        original_alpha = alpha
+        best_value, best_move = float("-inf"), None
+        for move in self.order_moves(position, moves, table_move):
+            value = self.child_value(position, move, depth - 1, alpha, beta)
+            if value > best_value:
+                best_value, best_move = value, move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (depth, bound, best_value, best_move)
+        return best_value
+
+    def evaluate_leaf(self, position: Position) -> float:
+        self.telemetry.evaluations += 1
+        if not self.profile:
+            return self.evaluator(position, position.side)
+        started = time.perf_counter()
+        value = self.evaluator(position, position.side)
+        self.telemetry.eval_s += time.perf_counter() - started
+        return value
+
+    def frontier_values(self, position: Position, moves: List[Move]) -> List[float]:
+        """Values of every child for the side to move, in one batch_evaluator call"""
+        self.nodes += len(moves)
+        if self.nodes >= self.node_limit or time.perf_counter() > self.deadline or (
+            self.stop is not None and self.stop.is_set()
+        ):
+            raise SearchAborted(None, None)
+        children = [position.apply(move) for move in moves]
+        self.telemetry.evaluations += len(children)
+        if not self.profile:
+            return self.batch_evaluator(children, position.side)
+        started = time.perf_counter()
+        values = self.batch_evaluator(children, position.side)
+        self.telemetry.eval_s += time.perf_counter() - started
+        return values
+
+    def order_moves(self, position: Position, moves: List[Move], first: Optional[Move]) -> List[Move]:
+        """Best known move first, then moves landing on the most fish"""
+        fish = position.fish
+        ordered = sorted(moves, key=lambda move: -fish[move[1]])
+        if first in moves:
+            ordered.remove(first)
+            ordered.insert(0, first)
+        return ordered
@@ -0,0 +1,472 @@
+"""Asyncio game server hosting many human-vs-TARS sessions over a JSON-lines protocol.
+
+Every request and response is one JSON object per line:
+
+    {"op": "new", "difficulty": "hard"}                   -> {"ok": true, "session": 1, "state": {...}}
+    {"op": "place", "session": 1, "col": 2, "row": 0}
+    {"op": "move", "session": 1, "from": [2, 0], "to": [2, 3]}
+    {"op": "state", "session": 1}
+    {"op": "close", "session": 1}
+    {"op": "stats"}
+
+After a human action the server plays TARS's replies on a process pool and
+returns them in the "ai" list together with the new state.
+"""
+
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import fish_ai
+from fish_rules import BoardSnapshot, CompactGame, GameState
+from fish_search import DEFAULT_DIFFICULTY, DIFFICULTY_LEVELS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+MAX_SESSIONS = 20000
+SESSION_IDLE_TIMEOUT = 600.0   # Seconds without a request before a session is dropped
+HUMAN_TIME_LIMIT = 900.0       # Total thinking time a human gets per game
+AI_TIME_LIMIT = 5.0            # Seconds before an AI turn falls back to a quick move
+AI_SEARCH_SHARE = 0.8          # Share of the AI time limit the search itself may use
+MAX_QUEUED_AI_TURNS = 64       # AI turns allowed to wait for a pool worker
+LATENCY_WINDOW = 2000          # AI latencies kept for percentiles
+
+class ServerBusy(Exception):
+    """Raised when the AI pool is saturated and a request should be retried"""
+
+class RequestError(Exception):
+    """Raised for malformed or illegal requests"""
+
+class Session:
+    """One game; kept small because a server holds thousands of them"""
+    __slots__ = ("session_id", "game", "difficulty", "last_active", "turn_started", "human_clock", "result", "busy")
+
+    def __init__(self, session_id: int, difficulty: str = DEFAULT_DIFFICULTY):
+        self.session_id = session_id
+        self.game = CompactGame()
+        self.difficulty = difficulty
+        self.last_active = time.monotonic()
+        self.turn_started = self.last_active
+        self.human_clock = 0.0
+        self.result = ""
+        self.busy = False
+
+def state_to_json(session: Session) -> dict:
+    snapshot = session.game.snapshot()
+    return {
+        "phase": snapshot.game_phase,
+        "current_player": snapshot.current_player,
+        "scores": list(snapshot.scores),
+        "fish": list(snapshot.fish),
+        "penguins": [list(p) for p in snapshot.penguins],
+        "human_clock": round(session.human_clock, 3),
+        "result": session.result,
+        "difficulty": session.difficulty,
+    }
+
+def quick_action(game: CompactGame) -> Optional[Tuple[int, ...]]:
+    """First legal action; used when the AI misses its time limit"""
+    actions = game.legal_actions()
+    return actions[0] if actions else None
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class GameServer:
+
+    def __init__(self, workers: Optional[int] = None, max_queue: int = MAX_QUEUED_AI_TURNS,
+                 ai_time_limit: float = AI_TIME_LIMIT, human_time_limit: float = HUMAN_TIME_LIMIT,
+                 idle_timeout: float = SESSION_IDLE_TIMEOUT, max_sessions: int = MAX_SESSIONS,
+                 decision_cache: Optional[str] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.decision_cache = decision_cache
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.max_queue = max_queue
+        self.ai_time_limit = ai_time_limit
+        self.human_time_limit = human_time_limit
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+
+        self.sessions: Dict[int, Session] = {}
+        self.session_ids = itertools.count(1)
+        self.ai_slots = asyncio.Semaphore(self.workers)
+
+        # Metrics
+        self.queue_depth = 0
+        self.ai_inflight = 0
+        self.counters = {
+            "sessions_created": 0, "sessions_finished": 0, "sessions_expired": 0,
+            "ai_turns": 0, "ai_timeouts": 0, "ai_illegal_actions": 0, "busy_rejections": 0, "requests": 0,
+        }
+        self.ai_latencies = deque(maxlen=LATENCY_WINDOW)
+
+    # --- Protocol ---------------------------------------------------------
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Requests on one connection are handled in order, so a slow AI turn
+        # stops us reading from that socket and TCP pushes back on the client
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.handle_line(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line: bytes) -> dict:
+        self.counters["requests"] += 1
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("request must be a JSON object")
+            return await self.handle_request(request)
+        except ServerBusy as exc:
+            self.counters["busy_rejections"] += 1
+            return {"ok": False, "error": "busy", "detail": str(exc)}
+        except (RequestError, ValueError, KeyError, TypeError) as exc:
+            return {"ok": False, "error": "bad_request", "detail": str(exc)}
+
+    async def handle_request(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "stats":
+            return {"ok": True, "stats": self.stats()}
+        if op == "new":
+            difficulty = request.get("difficulty", DEFAULT_DIFFICULTY)
+            if difficulty not in DIFFICULTY_LEVELS:
+                raise RequestError(f"unknown difficulty {difficulty!r}")
+            session = self.new_session(difficulty)
+            return {"ok": True, "session": session.session_id, "state": state_to_json(session)}
+
+        session = self.sessions.get(request.get("session"))
+        if session is None:
+            raise RequestError("unknown session")
+        session.last_active = time.monotonic()
+
+        if op == "state":
+            return {"ok": True, "session": session.session_id, "state": state_to_json(session)}
+        if op == "close":
+            self.drop_session(session)
+            return {"ok": True, "session": session.session_id}
+        if op in ("place", "move"):
+            if session.busy:
+                raise RequestError("session is waiting for the AI")
+            session.busy = True
+            try:
+                ai_actions = await self.play_human_turn(session, op, request)
+            finally:
+                session.busy = False
+            return {"ok": True, "session": session.session_id, "ai": ai_actions, "state": state_to_json(session)}
+        raise RequestError(f"unknown op {op!r}")
+
+    # --- Sessions ---------------------------------------------------------
+
+    def new_session(self, difficulty: str = DEFAULT_DIFFICULTY) -> Session:
+        if len(self.sessions) >= self.max_sessions:
+            raise ServerBusy("session limit reached")
+        session = Session(next(self.session_ids), difficulty)
+        self.sessions[session.session_id] = session
+        self.counters["sessions_created"] += 1
+        return session
+
+    def drop_session(self, session: Session):
+        self.sessions.pop(session.session_id, None)
+
+    def finish_session(self, session: Session, result: str = ""):
+        game = session.game
+        game.game_phase = "game_over"
+        if not session.result:
+            session.result = result or {0: "human", 1: "ai", -1: "tie"}[game.winner()]
+            self.counters["sessions_finished"] += 1
+
+    async def expire_idle_sessions(self, interval: float = 5.0):
+        while True:
+            await asyncio.sleep(interval)
+            cutoff = time.monotonic() - self.idle_timeout
+            for session in [s for s in self.sessions.values() if s.last_active < cutoff and not s.busy]:
+                self.drop_session(session)
+                self.counters["sessions_expired"] += 1
+
+    # --- Turns ------------------------------------------------------------
+
+    async def play_human_turn(self, session: Session, op: str, request: dict) -> List[List[int]]:
+        game = session.game
+        if game.game_phase == "game_over":
+            raise RequestError("game is over")
+        if game.current_player != 0:
+            raise RequestError("not your turn")
+
+        # Refuse before touching the board so the client can simply retry
+        if self.queue_depth >= self.max_queue:
+            raise ServerBusy(f"{self.queue_depth} AI turns queued")
+
+        # Charge the time since the last charge, so a rejected request does not
+        # get the same thinking time charged again on the retry
+        now = time.monotonic()
+        session.human_clock += now - session.turn_started
+        session.turn_started = now
+        if session.human_clock > self.human_time_limit:
+            self.finish_session(session, "human_timeout")
+            return []
+
+        if op == "place":
+            played = game.play_placement(int(request["col"]), int(request["row"]))
+        else:
+            (from_col, from_row), (to_col, to_row) = request["from"], request["to"]
+            played = game.play_move(int(from_col), int(from_row), int(to_col), int(to_row))
+        if not played:
+            raise RequestError(f"illegal {op}")
+
+        ai_actions = []
+        while game.current_player == 1 and game.game_phase != "game_over":
+            action = await self.ai_action(game, session.difficulty)
+            if action is None:
+                game.resign()
+                break
+            played = game.play_placement(*action) if len(action) == 2 else game.play_move(*action)
+            if not played:
+                # E.g. from a bad cache entry; asking again would loop forever
+                self.counters["ai_illegal_actions"] += 1
+                print(json.dumps({"time": round(time.time(), 3), "session": session.session_id,
+                                  "error": "illegal AI action", "action": list(action)}), file=sys.stderr, flush=True)
+                self.finish_session(session, "ai_error")
+                break
+            ai_actions.append(list(action))
+
+        if game.game_phase == "game_over":
+            self.finish_session(session)
+        session.turn_started = time.monotonic()
+        return ai_actions
+
+    async def ai_action(self, game: CompactGame, difficulty: str) -> Optional[Tuple[int, ...]]:
+        loop = asyncio.get_running_loop()
+        snapshot = game.snapshot()
+        started = time.perf_counter()
+
+        self.queue_depth += 1
+        try:
+            await self.ai_slots.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        self.ai_inflight += 1
+        try:
+            job = self.pool.submit(fish_ai.choose_action_for_snapshot, snapshot, difficulty, self.decision_cache,
+                                   self.ai_time_limit * AI_SEARCH_SHARE * 1000)
+        except BaseException:
+            self.release_ai_slot()
+            raise
+        # The slot is held until the job itself ends, not just until we stop
+        # waiting for it, so the semaphore keeps bounding the work in the pool
+        job.add_done_callback(lambda _: loop.is_closed() or loop.call_soon_threadsafe(self.release_ai_slot))
+        try:
+            action = await asyncio.wait_for(asyncio.wrap_future(job), self.ai_time_limit)
+        except asyncio.TimeoutError:
+            self.counters["ai_timeouts"] += 1
+            action = quick_action(game)
+
+        self.counters["ai_turns"] += 1
+        self.ai_latencies.append(time.perf_counter() - started)
+        return action
+
+    def release_ai_slot(self):
+        self.ai_inflight -= 1
+        self.ai_slots.release()
+
+    # --- Metrics ----------------------------------------------------------
+
+    def stats(self) -> dict:
+        latencies = list(self.ai_latencies)
+        return {
+            "sessions": len(self.sessions),
+            "queue_depth": self.queue_depth,
+            "ai_inflight": self.ai_inflight,
+            "workers": self.workers,
+            **self.counters,
+            "ai_latency_ms": {
+                "p50": round(percentile(latencies, 0.50) * 1000, 2),
+                "p90": round(percentile(latencies, 0.90) * 1000, 2),
+                "p99": round(percentile(latencies, 0.99) * 1000, 2),
+                "max": round(max(latencies, default=0.0) * 1000, 2),
+            },
+        }
+
+    async def report_stats(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            print(json.dumps({"time": round(time.time(), 3), **self.stats()}), file=sys.stderr, flush=True)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    stats_interval: float = 0.0, ready: Optional[asyncio.Future] = None):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=1 << 16)
+        background = [asyncio.create_task(self.expire_idle_sessions())]
+        if stats_interval > 0:
+            background.append(asyncio.create_task(self.report_stats(stats_interval)))
+        if ready is not None:
+            ready.set_result(server.sockets[0].getsockname()[:2])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in background:
+                task.cancel()
+            self.pool.shutdown(cancel_futures=True)
+
+class GameClient:
+    """Minimal JSON-lines client, for tests and load generation"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> "GameClient":
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 16)
+        return cls(reader, writer)
+
+    async def request(self, op: str, **fields) -> dict:
+        self.writer.write(json.dumps({"op": op, **fields}).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+async def play_greedy_game(client: GameClient, difficulty: str = DEFAULT_DIFFICULTY) -> dict:
+    """Play one session as the human using TARS's classic heuristic"""
+    response = await client.request("new", difficulty=difficulty)
+    session_id = response["session"]
+    human = fish_ai.AIPlayer(0, "classic")
+    game = GameState()
+
+    while response["state"]["phase"] != "game_over":
+        state = response["state"]
+        game.restore_snapshot(BoardSnapshot(
+            bytes(state["fish"]), tuple(tuple(p) for p in state["penguins"]),
+            tuple(state["scores"]), state["current_player"], state["phase"],
+        ))
+        action = human.choose_action(game)
+        if action is None:
+            break
+        if len(action) == 2:
+            op, fields = "place", {"col": action[0], "row": action[1]}
+        else:
+            op, fields = "move", {"from": action[:2], "to": action[2:]}
+
+        response = await client.request(op, session=session_id, **fields)
+        while not response["ok"] and response["error"] == "busy":
+            await asyncio.sleep(0.05)  # Backpressure: wait for the AI pool to drain
+            response = await client.request(op, session=session_id, **fields)
+        if not response["ok"]:
+            raise RuntimeError(response)
+
+    await client.request("close", session=session_id)
+    return response["state"]
+
+async def run_bench(games: int, idle_sessions: int, workers: Optional[int], difficulty: str = DEFAULT_DIFFICULTY,
+                    decision_cache: Optional[str] = None):
+    """Start a local server, hold idle sessions and play greedy games against it"""
+    server = GameServer(workers=workers, decision_cache=decision_cache)
+    ready = asyncio.get_running_loop().create_future()
+    serve_task = asyncio.create_task(server.serve(port=0, ready=ready))
+    host, port = await ready
+
+    idle_client = await GameClient.connect(host, port)
+    for _ in range(idle_sessions):
+        await idle_client.request("new")
+
+    started = time.perf_counter()
+
+    async def one_game():
+        client = await GameClient.connect(host, port)
+        try:
+            return await play_greedy_game(client, difficulty)
+        finally:
+            await client.close()
+
+    results = await asyncio.gather(*(one_game() for _ in range(games)))
+    elapsed = time.perf_counter() - started
+
+    stats = (await idle_client.request("stats"))["stats"]
+    await idle_client.close()
+    serve_task.cancel()
+    try:
+        await serve_task
+    except asyncio.CancelledError:
+        pass
+
+    print(f"Played {len(results)} games in {elapsed:.2f}s with {idle_sessions} idle sessions held")
+    print(json.dumps(stats, indent=2))
+
+def run_memory(sessions: int):
+    """Print bytes per live game with sessions games held at once"""
+    report = {"sessions": sessions}
+    for name, make in (("session", Session), ("compact_game", lambda _: CompactGame()),
+                       ("game_state", lambda _: GameState())):
+        gc.collect()
+        tracemalloc.start()
+        held = {session_id: make(session_id) for session_id in range(sessions)}
+        report[f"{name}_bytes"] = round(tracemalloc.get_traced_memory()[0] / sessions)
+        tracemalloc.stop()
+        del held
+    print(json.dumps(report))
+
+def main():
+    parser = argparse.ArgumentParser(description="Eat the Fish multi-session game server")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    serve = subcommands.add_parser("serve", help="run the server")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--workers", type=int, default=None, help="AI process pool size (default: all cores)")
+    serve.add_argument("--max-queue", type=int, default=MAX_QUEUED_AI_TURNS)
+    serve.add_argument("--ai-time-limit", type=float, default=AI_TIME_LIMIT)
+    serve.add_argument("--human-time-limit", type=float, default=HUMAN_TIME_LIMIT)
+    serve.add_argument("--idle-timeout", type=float, default=SESSION_IDLE_TIMEOUT)
+    serve.add_argument("--stats-interval", type=float, default=10.0,
+                       help="seconds between JSON stats lines on stderr (0 disables)")
+    serve.add_argument("--decision-cache", default=None, help="SQLite file caching TARS's decisions")
+
+    bench = subcommands.add_parser("bench", help="play local clients against an in-process server")
+    bench.add_argument("--games", type=int, default=50)
+    bench.add_argument("--idle-sessions", type=int, default=5000)
+    bench.add_argument("--workers", type=int, default=None)
+    bench.add_argument("--difficulty", choices=list(DIFFICULTY_LEVELS), default=DEFAULT_DIFFICULTY)
+    bench.add_argument("--decision-cache", default=None)
+
+    memory = subcommands.add_parser("memory", help="report bytes per live game")
+    memory.add_argument("--sessions", type=int, default=10_000)
+
+    args = parser.parse_args()
+    if args.command == "memory":
+        run_memory(args.sessions)
+    elif args.command == "serve":
+        server = GameServer(args.workers, args.max_queue, args.ai_time_limit,
+                            args.human_time_limit, args.idle_timeout, decision_cache=args.decision_cache)
+        try:
+            asyncio.run(server.serve(args.host, args.port, args.stats_interval))
+        except KeyboardInterrupt:
+            pass
+    else:
+        asyncio.run(run_bench(args.games, args.idle_sessions, args.workers, args.difficulty, args.decision_cache))
+
+if __name__ == "__main__":
+    main()
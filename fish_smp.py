@@ -0,0 +1,182 @@
+"""Lazy SMP: several search processes over one position sharing a transposition table.
+
+Every worker runs the ordinary iterative-deepening search on the same
+position. Helpers shuffle their move order a little and start one ply
+deeper, so they explore different parts of the tree first, and what one
+worker stores in the shared table cuts off work for the others. The table
+lives in multiprocessing.shared_memory and is read and written without
+locks; a slot torn by two racing writers fails its checksum and reads as a
+miss.
+"""
+
+import atexit
+import random
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fish_search import Move, Position, SearchBudget, SearchEngine, SearchResult
+
+TABLE_SLOTS = 1 << 20  # Power of two; 24 bytes each
+SLOT_WORDS = 3         # checksum, packed entry, value bits
+HEADER_BYTES = 8       # Byte 0 is the stop flag
+
+# How far a helper may move a move up or down the ordering, in places
+HELPER_JITTER = 3
+
+_MASK64 = (1 << 64) - 1
+_FLOAT = struct.Struct("<d")
+_WORD = struct.Struct("<Q")
+
+class SharedTable:
+    """Fixed-size transposition table in shared memory, usable as SearchEngine.table"""
+
+    def __init__(self, slots: int = TABLE_SLOTS, name: Optional[str] = None):
+        if slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.slots = slots
+        self.owner = name is None
+        self.memory = SharedMemory(name=name, create=self.owner, size=HEADER_BYTES + slots * SLOT_WORDS * 8)
+        self.view = self.memory.buf[HEADER_BYTES:]
+        self.words = self.view.cast("Q")
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def get(self, key: Tuple) -> Optional[Tuple[int, int, float, Optional[Move]]]:
+        check = hash(key) & _MASK64
+        slot = (check & (self.slots - 1)) * SLOT_WORDS
+        words = self.words
+        stored, data, bits = words[slot], words[slot + 1], words[slot + 2]
+        if not data or stored ^ data ^ bits != check:
+            return None
+        move = None
+        if data >> 10 & 1:
+            move = ((data >> 11 & 0x7F) - 1, data >> 18 & 0x3F)
+        return data & 0xFF, data >> 8 & 0x3, _FLOAT.unpack(_WORD.pack(bits))[0], move
+
+    def __setitem__(self, key: Tuple, entry: Tuple[int, int, float, Optional[Move]]):
+        depth, bound, value, move = entry
+        data = 1 << 24 | depth & 0xFF | bound << 8  # Bit 24 marks the slot as used
+        if move is not None:
+            data |= 1 << 10 | (move[0] + 1) << 11 | move[1] << 18
+        bits = _WORD.unpack(_FLOAT.pack(value))[0]
+        check = hash(key) & _MASK64
+        slot = (check & (self.slots - 1)) * SLOT_WORDS
+        words = self.words
+        words[slot + 1] = data
+        words[slot + 2] = bits
+        words[slot] = check ^ data ^ bits
+
+    def clear(self):
+        self.memory.buf[HEADER_BYTES:] = bytes(self.slots * SLOT_WORDS * 8)
+
+    def set_stop(self, stop: bool):
+        self.memory.buf[0] = stop
+
+    def is_set(self) -> bool:
+        """Stop flag, so the table doubles as SearchEngine.stop across processes"""
+        return bool(self.memory.buf[0])
+
+    def close(self):
+        # The views must go before the mapping can be closed
+        self.words.release()
+        self.view.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+class HelperEngine(SearchEngine):
+    """A Lazy SMP helper: same search, slightly shuffled move order"""
+
+    def __init__(self, helper: int, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rng = random.Random(helper)
+
+    def order_moves(self, position: Position, moves: List[Move], first: Optional[Move]) -> List[Move]:
+        ordered = super().order_moves(position, moves, first)
+        keep = 1 if first in moves else 0
+        jittered = sorted(range(keep, len(ordered)),
+                          key=lambda place: place + self.rng.uniform(-HELPER_JITTER, HELPER_JITTER))
+        return ordered[:keep] + [ordered[place] for place in jittered]
+
+# Per worker process: tables attached so far and the engine for each helper id
+_tables: Dict[str, SharedTable] = {}
+_engines: Dict[Tuple[str, int], SearchEngine] = {}
+
+def attach_table(table_name: str, slots: int) -> SharedTable:
+    table = _tables.get(table_name)
+    if table is None:
+        table = _tables[table_name] = SharedTable(slots, table_name)
+        atexit.register(table.close)
+    return table
+
+def start_worker(table_name: str, slots: int):
+    attach_table(table_name, slots)
+
+def search_worker(table_name: str, slots: int, helper: int, position: Position, budget: SearchBudget,
+                  evaluator: Callable, batch_evaluator: Optional[Callable], profile: bool = False) -> SearchResult:
+    """Process-pool entry point: one worker's search over the shared table"""
+    table = attach_table(table_name, slots)
+    engine = _engines.get((table_name, helper))
+    if engine is None:
+        engine = SearchEngine(table=table) if helper == 0 else HelperEngine(helper, table=table)
+        engine.first_depth = 1 + helper % 2
+        _engines[(table_name, helper)] = engine
+    engine.evaluator = evaluator
+    engine.batch_evaluator = batch_evaluator
+    engine.profile = profile
+    return engine.search(position, budget, table)
+
+class ParallelSearch:
+    """Runs one main search and workers - 1 helpers in separate processes.
+
+    With one worker this is just the ordinary search moved out of the calling
+    process, e.g. so the game's render loop never waits on it for the GIL.
+    """
+
+    def __init__(self, workers: int, slots: int = TABLE_SLOTS, profile: bool = False):
+        self.workers = workers
+        self.profile = profile
+        self.table = SharedTable(slots)
+        # Spawned, not forked: the game window's threads and GL context must
+        # not be copied into the workers
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        for _ in range(workers):
+            # Start the processes now rather than on the first move
+            self.pool.submit(start_worker, self.table.name, slots)
+
+    def search(self, position: Position, budget: SearchBudget, evaluator: Callable,
+               batch_evaluator: Optional[Callable] = None, stop: Optional[threading.Event] = None) -> SearchResult:
+        """Best move of the deepest iteration any worker finished; setting
+        stop (then calling halt()) aborts early like an exhausted budget"""
+        self.table.set_stop(False)
+        if stop is not None and stop.is_set():
+            self.table.set_stop(True)  # stop was set before the flag was cleared
+        futures = [
+            self.pool.submit(search_worker, self.table.name, self.table.slots, helper, position, budget,
+                             evaluator, batch_evaluator, self.profile)
+            for helper in range(self.workers)
+        ]
+        # The main worker decides when the search is over, as in Lazy SMP
+        main = futures[0].result()
+        self.table.set_stop(True)
+        results = [main] + [future.result() for future in futures[1:]]
+
+        best = max(results, key=lambda result: result.depth)  # Ties go to the main worker
+        best.nodes = sum(result.nodes for result in results)
+        best.elapsed_ms = main.elapsed_ms
+        return best
+
+    def halt(self):
+        """Stop the running search from another thread"""
+        self.table.set_stop(True)
+
+    def close(self):
+        self.table.set_stop(True)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.table.close()
@@ -0,0 +1,243 @@
+"""Self-play tuning of TARS's heuristic weights with SPSA.
+
+Each iteration perturbs every weight at once by a random +/- step, plays the
+two perturbed players against each other on all cores (each opening twice,
+with colours swapped) and moves the weights towards the side that won.
+Progress is checkpointed to JSON so a run can be interrupted and resumed;
+the best estimate replaces the weights file AIPlayer loads only once it has
+beaten the starting weights in a verification match.
+
+The players search with --evaluation, and only that evaluation's weights
+are tuned: search_territory for "territory" at any difficulty. "learned"
+has no EvalWeights to tune; fish_value.py trains it.
+
+    python fish_tune.py --iterations 200 --games 32
+    python fish_tune.py --difficulty medium --evaluation territory
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import List, Optional, Sequence, Tuple
+
+from fish_ai import DEFAULT_EVALUATION, WEIGHTS_PATH, AIPlayer, EvalWeights, default_weights
+from fish_rules import BOARD_COLS, BOARD_ROWS, FishCount, GameState
+from fish_search import DIFFICULTY_LEVELS
+
+CHECKPOINT_PATH = "tars_tune_checkpoint.json"
+CANDIDATE_PATH = "tars_weights_candidate.json"  # Tuned weights that were not verified better
+
+# Random placements per side before the players take over, so self-play
+# games differ even though the heuristics themselves are deterministic
+OPENING_PLACEMENTS = 1
+
+# SPSA gains (Spall's recommended exponents); steps are taken in units of
+# each weight's scale, so one schedule suits all of them
+SPSA_A = 0.1        # Step size numerator
+SPSA_C = 0.2        # Perturbation size numerator
+SPSA_ALPHA = 0.602
+SPSA_GAMMA = 0.101
+MAX_STEP = 0.5      # Largest change per iteration, in scale units
+
+# Weights tuned at each difficulty and evaluation; the other weights never
+# affect play there. The territory evaluation also replaces the greedy
+# heuristic at "classic"
+GREEDY_WEIGHTS = ("move_to_fish", "move_blocks_opponent", "move_center", "place_adjacent_fish", "place_center")
+SEARCH_WEIGHTS = ("search_mobility", "search_reachable_fish")
+TERRITORY_WEIGHTS = ("search_territory",)
+TUNED_EVALUATIONS = ("heuristic", "territory")
+
+# A weight outside these bounds only makes play worse, and keeping heuristic
+# scores small keeps them above the greedy players' -1000 sentinel
+WEIGHT_BOUNDS = (-10.0, 10.0)
+
+def tuned_names(difficulty: str, evaluation: str = DEFAULT_EVALUATION) -> Tuple[str, ...]:
+    if evaluation == "territory":
+        return TERRITORY_WEIGHTS
+    return GREEDY_WEIGHTS if DIFFICULTY_LEVELS[difficulty] is None else SEARCH_WEIGHTS
+
+def play_game(weights: Sequence[EvalWeights], difficulty: str, seed: int,
+              evaluation: str = DEFAULT_EVALUATION) -> Tuple[int, int]:
+    """Play one game between weights[0] (first) and weights[1]; returns the final scores"""
+    rng = random.Random(seed)
+    random.seed(seed)  # The board's last column is random
+    game = GameState()
+    players = [AIPlayer(player, difficulty, weights[player], evaluation) for player in (0, 1)]
+
+    for _ in range(2 * OPENING_PLACEMENTS):
+        free = [(col, row) for col in range(BOARD_COLS) for row in range(BOARD_ROWS)
+                if game.get_tile(col, row).fish_count == FishCount.ONE and not game.get_tile(col, row).has_penguin]
+        game.play_placement(*rng.choice(free))
+
+    while game.game_phase != "game_over":
+        action = players[game.current_player].choose_action(game)
+        if action is None:
+            game.resign()
+        elif len(action) == 2:
+            game.play_placement(*action)
+        else:
+            game.play_move(*action)
+
+    for player in players:
+        player.close()
+    return tuple(game.player_scores)
+
+def play_pair(plus: EvalWeights, minus: EvalWeights, difficulty: str, seed: int,
+              evaluation: str = DEFAULT_EVALUATION) -> float:
+    """Play one opening with both colour assignments; +1 per plus win, -1 per loss"""
+    result = 0.0
+    for swap in (False, True):
+        scores = play_game((minus, plus) if swap else (plus, minus), difficulty, seed, evaluation)
+        plus_score, minus_score = (scores[1], scores[0]) if swap else scores
+        result += (plus_score > minus_score) - (plus_score < minus_score)
+    return result
+
+class SPSATuner:
+    """Simultaneous perturbation stochastic approximation over EvalWeights"""
+
+    def __init__(self, start: EvalWeights, names: Sequence[str], difficulty: str,
+                 games: int, iterations: int, seed: int, pool: ProcessPoolExecutor,
+                 evaluation: str = DEFAULT_EVALUATION):
+        self.names = list(names)
+        self.difficulty = difficulty
+        self.evaluation = evaluation
+        self.pairs = max(1, games // 2)
+        self.iterations = iterations
+        self.seed = seed
+        self.pool = pool
+        self.base = start
+        self.scales = [max(abs(getattr(start, name)), 0.1) for name in self.names]
+        self.theta = [getattr(start, name) for name in self.names]
+        self.iteration = 0
+        self.history: List[dict] = []
+
+    def weights(self, theta: Sequence[float]) -> EvalWeights:
+        return replace(self.base, **dict(zip(self.names, theta)))
+
+    def match(self, plus: EvalWeights, minus: EvalWeights, first_seed: int) -> float:
+        """Mean result of plus against minus over self.pairs openings, in [-2, 2]"""
+        results = self.pool.map(play_pair, [plus] * self.pairs, [minus] * self.pairs,
+                                [self.difficulty] * self.pairs, range(first_seed, first_seed + self.pairs),
+                                [self.evaluation] * self.pairs)
+        return sum(results) / self.pairs
+
+    def step(self) -> dict:
+        k = self.iteration
+        rng = random.Random(f"{self.seed}-{k}")  # Resumed runs replay the same perturbations
+        a_k = SPSA_A / (k + 1 + self.iterations / 10) ** SPSA_ALPHA
+        c_k = SPSA_C / (k + 1) ** SPSA_GAMMA
+        delta = [rng.choice((-1, 1)) for _ in self.names]
+
+        plus = [value + c_k * d * scale for value, d, scale in zip(self.theta, delta, self.scales)]
+        minus = [value - c_k * d * scale for value, d, scale in zip(self.theta, delta, self.scales)]
+        result = self.match(self.weights(plus), self.weights(minus), rng.randrange(2 ** 31))
+
+        low, high = WEIGHT_BOUNDS
+        for i, (d, scale) in enumerate(zip(delta, self.scales)):
+            gradient = result / (2 * c_k * d)
+            move = max(-MAX_STEP, min(MAX_STEP, a_k * gradient))
+            self.theta[i] = max(low, min(high, self.theta[i] + move * scale))
+
+        self.iteration += 1
+        entry = {"iteration": self.iteration, "result": result,
+                 "weights": dict(zip(self.names, self.theta))}
+        self.history.append(entry)
+        return entry
+
+    def save(self, path: str):
+        state = {"difficulty": self.difficulty, "evaluation": self.evaluation, "seed": self.seed, "iteration": self.iteration,
+                 "names": self.names, "theta": self.theta, "base": self.base.to_vector(),
+                 "history": self.history}
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f, indent=1)
+        os.replace(path + ".tmp", path)  # Never leave a half-written checkpoint
+
+    def restore(self, path: str):
+        with open(path) as f:
+            state = json.load(f)
+        evaluation = state.get("evaluation", DEFAULT_EVALUATION)  # Older checkpoints were all heuristic
+        if state["names"] != self.names or state["difficulty"] != self.difficulty or evaluation != self.evaluation:
+            raise ValueError(f"{path} was written for {state['difficulty']} {evaluation} weights {state['names']}")
+        self.seed = state["seed"]
+        self.iteration = state["iteration"]
+        self.theta = state["theta"]
+        self.base = EvalWeights.from_vector(state["base"])
+        self.history = state["history"]
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Tune TARS's heuristic weights by parallel self-play")
+    parser.add_argument("--difficulty", choices=list(DIFFICULTY_LEVELS), default="classic",
+                        help="level to tune: classic tunes the greedy weights, the others the search evaluation")
+    parser.add_argument("--evaluation", choices=TUNED_EVALUATIONS, default=DEFAULT_EVALUATION,
+                        help="evaluation the players search with; territory tunes search_territory")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--games", type=int, default=32, help="self-play games per iteration")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--checkpoint-every", type=int, default=5, help="iterations between checkpoints")
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--output", default=WEIGHTS_PATH, help="tuned weights file")
+    parser.add_argument("--verify-games", type=int, default=200,
+                        help="games of tuned against starting weights at the end (0 skips)")
+    parser.add_argument("--candidate", default=CANDIDATE_PATH,
+                        help="where tuned weights go when they lose or skip verification")
+    parser.add_argument("--force", action="store_true",
+                        help="write --output even if the tuned weights lose or skip verification")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        tuner = SPSATuner(default_weights(), tuned_names(args.difficulty, args.evaluation), args.difficulty,
+                          args.games, args.iterations, args.seed, pool, args.evaluation)
+        if os.path.exists(args.checkpoint) and not args.fresh:
+            tuner.restore(args.checkpoint)
+            print(f"resuming {args.checkpoint} at iteration {tuner.iteration}", file=sys.stderr)
+        first_iteration = tuner.iteration
+
+        try:
+            while tuner.iteration < args.iterations:
+                entry = tuner.step()
+                print(json.dumps(entry), flush=True)
+                if tuner.iteration % args.checkpoint_every == 0:
+                    tuner.save(args.checkpoint)
+        except KeyboardInterrupt:
+            print("interrupted; saving checkpoint", file=sys.stderr)
+            tuner.save(args.checkpoint)
+            return
+        tuner.save(args.checkpoint)
+
+        tuned = tuner.weights(tuner.theta)
+        games = tuner.pairs * 2 * (tuner.iteration - first_iteration)
+        print(f"tuned for {tuner.iteration} iterations "
+              f"({games / (time.perf_counter() - started):.0f} games/s)", file=sys.stderr)
+
+        better = False
+        if args.verify_games > 0:
+            tuner.pairs = max(1, args.verify_games // 2)
+            score = tuner.match(tuned, tuner.base, args.seed * 1_000_003)
+            # score is wins minus losses per opening pair; map it to a match share
+            share = (score + 2) / 4
+            elo = 400 * math.log10(share / (1 - share)) if 0 < share < 1 else math.copysign(math.inf, score)
+            print(f"tuned vs starting weights: {share:.1%} of points over {tuner.pairs * 2} games "
+                  f"({elo:+.0f} Elo)", file=sys.stderr)
+            better = share > 0.5
+
+        # The live weights file is read by every AIPlayer, so only a verified
+        # improvement replaces it
+        output = args.output if better or args.force else args.candidate
+        tuned.save(output)
+        if output == args.output:
+            print(f"wrote {output}", file=sys.stderr)
+        else:
+            reason = "not verified" if args.verify_games <= 0 else "no better than the starting weights"
+            print(f"wrote {output}; {args.output} unchanged ({reason}, --force overrides)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Learned linear value function for TARS, evaluated in batches with NumPy.
+
+A position is encoded from one player's point of view as feature planes over
+the board (tiles by fish count, own and opposing penguins, tiles each side
+can reach) plus a few scalars, and its value is the dot product with a
+trained weight vector. Scoring many positions is one matrix multiply.
+
+Weights are fitted offline by ridge regression on the final fish margin of
+recorded self-play games:
+
+    python fish_value.py record --games 2000 --difficulty easy
+    python fish_value.py train
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from fish_rules import RAYS, TOTAL_TILES, BoardSnapshot, GameState, tile_position
+from fish_search import DIFFICULTY_LEVELS, PLACE, WIN_BONUS, Position
+
+VALUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tars_value.npz")
+GAMES_PATH = "tars_games.jsonl"
+
+PLANES = ("one_fish", "two_fish", "three_fish", "own_penguins", "their_penguins", "own_reach", "their_reach")
+SCALARS = ("score_diff", "move_diff", "reach_fish_diff", "to_move", "placing", "bias")
+FEATURES = len(PLANES) * TOTAL_TILES + len(SCALARS)
+
+# Chance of a random action while recording, so games cover more positions
+EXPLORE_RATE = 0.1
+RIDGE = 1.0
+
+# RAY_MASKS[tile][direction][n] is the bitmask of the first n tiles of that ray
+RAY_MASKS = [
+    [tuple(sum(1 << target for target in ray[:n]) for n in range(len(ray) + 1)) for ray in tile_rays]
+    for tile_rays in RAYS
+]
+_SHIFTS = np.arange(TOTAL_TILES, dtype=np.uint64)
+
+def bitplanes(masks: Sequence[int]) -> np.ndarray:
+    """(len(masks), TOTAL_TILES) array of 0/1 from tile bitmasks"""
+    return (np.array(masks, dtype=np.uint64)[:, None] >> _SHIFTS & np.uint64(1)).astype(np.float32)
+
+def reach_mask(position: Position, player: int) -> int:
+    mask = 0
+    for index, penguin_reach in zip(position.penguins[player], position.reach[player]):
+        tile_masks = RAY_MASKS[index]
+        for direction, distance in enumerate(penguin_reach):
+            if distance:
+                mask |= tile_masks[direction][distance]
+    return mask
+
+def penguin_mask(position: Position, player: int) -> int:
+    mask = 0
+    for index in position.penguins[player]:
+        mask |= 1 << index
+    return mask
+
+def encode(positions: Sequence[Position], player: int) -> np.ndarray:
+    """Feature matrix, one row per position, seen by player"""
+    other = 1 - player
+    masks = []
+    scalars = np.empty((len(positions), len(SCALARS)), dtype=np.float32)
+    for row, position in enumerate(positions):
+        masks.append(position.tiles)
+        masks.append(penguin_mask(position, player))
+        masks.append(penguin_mask(position, other))
+        masks.append(reach_mask(position, player))
+        masks.append(reach_mask(position, other))
+        my_moves = sum(map(sum, position.reach[player]))
+        their_moves = sum(map(sum, position.reach[other]))
+        scalars[row] = (position.scores[player] - position.scores[other], my_moves - their_moves, 0.0,
+                        1.0 if position.side == player else -1.0, float(position.placing), 1.0)
+
+    planes = bitplanes(masks).reshape(len(positions), 5, TOTAL_TILES)
+    fish = np.array([p.fish for p in positions], dtype=np.float32) * planes[:, 0]
+    scalars[:, 2] = (planes[:, 3] * fish).sum(axis=1) - (planes[:, 4] * fish).sum(axis=1)
+    return np.hstack((
+        fish == 1, fish == 2, fish == 3, planes[:, 1:].reshape(len(positions), -1), scalars,
+    ), dtype=np.float32)
+
+class LinearValue:
+    """Expected final fish margin as a linear function of the features"""
+
+    def __init__(self, weights: np.ndarray):
+        if weights.shape != (FEATURES,):
+            raise ValueError(f"expected {FEATURES} weights, got {weights.shape}")
+        self.weights = weights.astype(np.float32)
+
+    @classmethod
+    def load(cls, path: str = VALUE_PATH) -> "LinearValue":
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; train one with `python fish_value.py train`")
+        with np.load(path) as data:
+            return cls(data["weights"])
+
+    def save(self, path: str = VALUE_PATH):
+        np.savez(path, weights=self.weights)
+
+    def evaluate_batch(self, positions: Sequence[Position], player: int) -> List[float]:
+        """Values for player of many positions with one matrix multiply;
+        finished games are scored exactly, like fish_search.evaluate"""
+        values = (encode(positions, player) @ self.weights).tolist()
+        for row, position in enumerate(positions):
+            if position.over:
+                score_diff = position.scores[player] - position.scores[1 - player]
+                values[row] = score_diff + (WIN_BONUS if score_diff > 0 else -WIN_BONUS) if score_diff else 0.0
+        return values
+
+    def __call__(self, position: Position, player: int) -> float:
+        return self.evaluate_batch([position], player)[0]
+
+def snapshot_to_json(snapshot: BoardSnapshot) -> list:
+    return [list(snapshot.fish), [list(p) for p in snapshot.penguins], list(snapshot.scores),
+            snapshot.current_player, snapshot.game_phase]
+
+def snapshot_from_json(data: list) -> BoardSnapshot:
+    fish, penguins, scores, current_player, game_phase = data
+    return BoardSnapshot(bytes(fish), tuple(tuple(p) for p in penguins), tuple(scores), current_player, game_phase)
+
+def record_game(difficulty: str, seed: int) -> dict:
+    """Self-play one game, returning every position before a move and the final scores"""
+    from fish_ai import AIPlayer  # fish_ai imports this module for learned evaluation
+
+    rng = random.Random(seed)
+    random.seed(seed)  # The board's last column is random
+    game = GameState()
+    players = [AIPlayer(player, difficulty) for player in (0, 1)]
+    snapshots = []
+    while game.game_phase != "game_over":
+        snapshots.append(snapshot_to_json(game.snapshot()))
+        if rng.random() < EXPLORE_RATE:
+            from_index, to_index = rng.choice(Position.from_game(game).legal_moves())
+            if from_index == PLACE:
+                action = tile_position(to_index)
+            else:
+                action = (*tile_position(from_index), *tile_position(to_index))
+        else:
+            action = players[game.current_player].choose_action(game)
+        if action is None:
+            game.resign()
+        elif len(action) == 2:
+            game.play_placement(*action)
+        else:
+            game.play_move(*action)
+    return {"positions": snapshots, "scores": list(game.player_scores)}
+
+def training_data(games: Sequence[dict]):
+    """Features and final margins, each position seen from both sides"""
+    rows, targets = [], []
+    for record in games:
+        final = record["scores"]
+        positions = [Position.from_game(GameState.from_snapshot(snapshot_from_json(data)))
+                     for data in record["positions"]]
+        for player in (0, 1):
+            rows.append(encode(positions, player))
+            targets.append(np.full(len(positions), final[player] - final[1 - player], dtype=np.float32))
+    return np.vstack(rows), np.concatenate(targets)
+
+def fit(features: np.ndarray, targets: np.ndarray, ridge: float = RIDGE) -> np.ndarray:
+    """Ridge regression weights; the bias is not penalised"""
+    penalty = np.full(FEATURES, ridge, dtype=np.float64)
+    penalty[-1] = 0.0
+    x = features.astype(np.float64)
+    return np.linalg.solve(x.T @ x + np.diag(penalty), x.T @ targets.astype(np.float64))
+
+def read_games(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Record self-play games and train TARS's linear value function")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    record = subcommands.add_parser("record", help="append self-play games to a JSON-lines file")
+    record.add_argument("--games", type=int, default=1000)
+    record.add_argument("--difficulty", choices=list(DIFFICULTY_LEVELS), default="easy")
+    record.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    record.add_argument("--seed", type=int, default=1)
+    record.add_argument("--output", default=GAMES_PATH)
+
+    train = subcommands.add_parser("train", help="fit the value function to recorded games")
+    train.add_argument("--input", default=GAMES_PATH)
+    train.add_argument("--output", default=VALUE_PATH)
+    train.add_argument("--ridge", type=float, default=RIDGE)
+    train.add_argument("--holdout", type=float, default=0.1, help="share of games kept for validation")
+
+    bench = subcommands.add_parser("bench", help="compare batched and one-at-a-time evaluation speed")
+    bench.add_argument("--input", default=GAMES_PATH)
+    bench.add_argument("--value", default=VALUE_PATH)
+
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+
+    if args.command == "record":
+        with ProcessPoolExecutor(max_workers=args.workers) as pool, open(args.output, "a") as out:
+            seeds = range(args.seed, args.seed + args.games)
+            for record_ in pool.map(record_game, [args.difficulty] * args.games, seeds, chunksize=8):
+                out.write(json.dumps(record_, separators=(",", ":")) + "\n")
+        print(f"recorded {args.games} games to {args.output} in {time.perf_counter() - started:.1f}s",
+              file=sys.stderr)
+
+    elif args.command == "train":
+        games = read_games(args.input)
+        random.Random(0).shuffle(games)
+        held = int(len(games) * args.holdout)
+        x, y = training_data(games[held:])
+        weights = fit(x, y, args.ridge)
+        LinearValue(weights).save(args.output)
+
+        report = {"games": len(games) - held, "positions": len(y), "train_rmse": float(np.sqrt(np.mean((x @ weights - y) ** 2)))}
+        if held:
+            x_test, y_test = training_data(games[:held])
+            report["holdout_rmse"] = float(np.sqrt(np.mean((x_test @ weights - y_test) ** 2)))
+            report["holdout_score_only_rmse"] = float(np.sqrt(np.mean((x_test[:, FEATURES - len(SCALARS)] - y_test) ** 2)))
+        report["seconds"] = round(time.perf_counter() - started, 1)
+        print(json.dumps(report))
+        print(f"wrote {args.output}", file=sys.stderr)
+
+    elif args.command == "bench":
+        value = LinearValue.load(args.value)
+        positions = [Position.from_game(GameState.from_snapshot(snapshot_from_json(data)))
+                     for record_ in read_games(args.input)[:200] for data in record_["positions"]]
+        timings = {}
+        for name, run in (("single", lambda: [value(p, 0) for p in positions]),
+                          ("batched", lambda: value.evaluate_batch(positions, 0))):
+            started = time.perf_counter()
+            run()
+            timings[name] = len(positions) / (time.perf_counter() - started)
+        print(json.dumps({"positions": len(positions), **{f"{k}_per_sec": round(v) for k, v in timings.items()}}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Many Eat the Fish games stepped together as stacked NumPy arrays.
+
+VectorEnv holds K boards and advances all of them with one vectorized call,
+following the same rules as GameRules (place_penguin, move_penguin,
+end_turn). It is meant for bulk simulation and training data, where
+stepping GameState or FishGame one board at a time is far too slow.
+
+An action is from_index * TOTAL_TILES + to_index. A placement on tile t is
+t * TOTAL_TILES + t.
+
+    python fish_vector.py --boards 1024 --steps 200
+"""
+
+import argparse
+import json
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from fish_rules import BOARD_COLS, FISH_PATTERN, RAYS, TOTAL_TILES, BoardSnapshot, tile_position
+
+ACTIONS = TOTAL_TILES * TOTAL_TILES
+PLACEMENT_ACTIONS = np.arange(TOTAL_TILES) * (TOTAL_TILES + 1)
+
+# Tile index used to pad rays and to stand in for unplaced penguins; never free
+OFF_BOARD = TOTAL_TILES
+MAX_RAY = max(len(ray) for tile_rays in RAYS for ray in tile_rays)
+
+# RAY_TILES[tile, direction, n] is the n-th tile along that ray, or OFF_BOARD
+RAY_TILES = np.full((TOTAL_TILES + 1, len(RAYS[0]), MAX_RAY), OFF_BOARD, dtype=np.intp)
+for _index, _tile_rays in enumerate(RAYS):
+    for _direction, _ray in enumerate(_tile_rays):
+        RAY_TILES[_index, _direction, :len(_ray)] = _ray
+
+# Fish for the patterned columns; the rest are drawn like GameRules.create_board
+PATTERN_FISH = np.array([FISH_PATTERN[index // BOARD_COLS][index % BOARD_COLS]
+                         if index % BOARD_COLS < len(FISH_PATTERN[0]) else 0
+                         for index in range(TOTAL_TILES)], dtype=np.int8)
+RANDOM_FISH = np.array([1, 1, 1, 2, 2, 3], dtype=np.int8)
+
+class VectorEnv:
+    """K games as arrays; all methods act on every board that is not done"""
+
+    def __init__(self, boards: int, penguins_per_player: int = 4, seed: Optional[int] = None):
+        self.boards = boards
+        self.penguins_per_player = penguins_per_player
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(boards)
+
+        self.fish = np.zeros((boards, TOTAL_TILES), dtype=np.int8)
+        self.alive = np.zeros((boards, TOTAL_TILES + 1), dtype=bool)  # Last column is OFF_BOARD
+        self.penguins = np.full((boards, 2, penguins_per_player), OFF_BOARD, dtype=np.intp)
+        self.placed = np.zeros((boards, 2), dtype=np.int8)
+        self.scores = np.zeros((boards, 2), dtype=np.int32)
+        self.side = np.zeros(boards, dtype=np.int8)
+        self.placing = np.zeros(boards, dtype=bool)
+        self.done = np.zeros(boards, dtype=bool)
+        self.reset()
+
+    def reset(self, mask: Optional[np.ndarray] = None):
+        """Start new games on the boards in mask (default: all)"""
+        boards = self.rows if mask is None else np.flatnonzero(mask)
+        fish = np.broadcast_to(PATTERN_FISH, (len(boards), TOTAL_TILES)).copy()
+        random_tiles = PATTERN_FISH == 0
+        fish[:, random_tiles] = self.rng.choice(RANDOM_FISH, size=(len(boards), int(random_tiles.sum())))
+        self.fish[boards] = fish
+        self.alive[boards, :TOTAL_TILES] = True
+        self.alive[boards, OFF_BOARD] = False
+        self.penguins[boards] = OFF_BOARD
+        self.placed[boards] = 0
+        self.scores[boards] = 0
+        self.side[boards] = 0
+        self.placing[boards] = True
+        self.done[boards] = False
+
+    def free_tiles(self) -> np.ndarray:
+        """(K, TOTAL_TILES + 1) tiles a penguin may move onto or through"""
+        free = self.alive.copy()
+        free[self.rows[:, None], self.penguins.reshape(self.boards, -1)] = False
+        return free
+
+    def reach(self, penguins: np.ndarray, free: np.ndarray) -> np.ndarray:
+        """(K, P, 8, MAX_RAY) tiles each of penguins (K, P) can move to"""
+        rays = RAY_TILES[penguins]
+        reach = free[self.rows[:, None], rays.reshape(self.boards, -1)].reshape(rays.shape)
+        for distance in range(1, MAX_RAY):
+            reach[..., distance] &= reach[..., distance - 1]
+        # Retired penguins stand on sunk tiles and never move again
+        reach &= self.alive[self.rows[:, None], penguins][:, :, None, None]
+        return reach
+
+    def legal_actions(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Legal actions as parallel (board, action) arrays, grouped by board;
+        much smaller than the legal_moves() mask"""
+        free = self.free_tiles()
+
+        placing = np.flatnonzero(self.placing & ~self.done)
+        can_place = free[placing, :TOTAL_TILES] & (self.fish[placing] == 1)
+        place_board, place_tile = np.nonzero(can_place)
+        place_board = placing[place_board]
+
+        penguins = self.penguins[self.rows, self.side]
+        reach = self.reach(penguins, free)
+        reach[self.placing | self.done] = False
+        move_board, slot, direction, step = np.nonzero(reach)
+        from_index = penguins[move_board, slot]
+
+        board = np.concatenate((place_board, move_board))
+        action = np.concatenate((PLACEMENT_ACTIONS[place_tile],
+                                 from_index * TOTAL_TILES + RAY_TILES[from_index, direction, step]))
+        order = np.argsort(board, kind="stable")
+        return board[order], action[order]
+
+    def legal_moves(self) -> np.ndarray:
+        """(K, ACTIONS) mask of legal actions for each board's side to move"""
+        legal = np.zeros((self.boards, ACTIONS), dtype=bool)
+        legal[self.legal_actions()] = True
+        return legal
+
+    def step(self, actions: np.ndarray,
+             legal: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> np.ndarray:
+        """Play one action on every unfinished board; returns the (K, 2) fish
+        each player gained. Actions for finished boards are ignored; pass the
+        legal_actions() pairs if they are already at hand to skip recomputing them."""
+        actions = np.asarray(actions, dtype=np.intp)
+        active = np.flatnonzero(~self.done)
+        board, action = self.legal_actions() if legal is None else legal
+        legal_codes = np.sort(board * ACTIONS + action)
+        codes = active * ACTIONS + actions[active]
+        found = np.minimum(np.searchsorted(legal_codes, codes), len(legal_codes) - 1)
+        if len(codes) and not (len(legal_codes) and (legal_codes[found] == codes).all()):
+            raise ValueError("illegal action for a board that is still playing")
+        active = ~self.done
+        from_index, to_index = np.divmod(actions, TOTAL_TILES)
+        gained = np.zeros((self.boards, 2), dtype=np.int32)
+
+        place = np.flatnonzero(active & self.placing)
+        side = self.side[place]
+        self.penguins[place, side, self.placed[place, side]] = to_index[place]
+        self.placed[place, side] += 1
+
+        move = np.flatnonzero(active & ~self.placing)
+        side = self.side[move]
+        slot = np.argmax(self.penguins[move, side] == from_index[move, None], axis=1)
+        self.penguins[move, side, slot] = to_index[move]
+        gained[move, side] += self.fish[move, from_index[move]]
+        self.alive[move, from_index[move]] = False
+
+        # Placement passes the turn until a side is out of penguins, then
+        # movement opens with start_playing's end_turn
+        finished = self.placed[place].min(axis=1) >= self.penguins_per_player
+        starting = place[finished]
+        self.placing[starting] = False
+        self.side[starting] = 1
+        waiting = place[~finished]
+        passing = waiting[self.placed[waiting, 1 - self.side[waiting]] < self.penguins_per_player]
+        self.side[passing] = 1 - self.side[passing]
+
+        ending = np.zeros(self.boards, dtype=bool)
+        ending[move] = True
+        ending[starting] = True
+        self.end_turn(ending, gained)
+        self.scores += gained
+        return gained
+
+    def end_turn(self, ending: np.ndarray, gained: np.ndarray):
+        """GameRules.end_turn for the boards in ending: retire stuck penguins,
+        then pass the turn, let the mover go again, or end the game"""
+        penguins = self.penguins.reshape(self.boards, -1)
+        free = self.free_tiles()
+        mobile = self.reach(penguins, free).any(axis=(2, 3))
+        standing = self.alive[self.rows[:, None], penguins]
+        stuck = standing & ~mobile & ending[:, None]
+
+        board, slot = np.nonzero(stuck)
+        tiles = penguins[board, slot]
+        np.add.at(gained, (board, slot // self.penguins_per_player), self.fish[board, tiles])
+        self.alive[board, tiles] = False
+
+        can_move = mobile.reshape(self.boards, 2, -1).any(axis=2)
+        over = ending & ~can_move.any(axis=1)
+        self.done |= over
+        passing = ending & ~over & can_move[self.rows, 1 - self.side]
+        self.side[passing] = 1 - self.side[passing]
+
+    def random_actions(self, legal: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> np.ndarray:
+        """A uniformly random legal action per board (0 for finished boards)"""
+        board, action = self.legal_actions() if legal is None else legal
+        counts = np.bincount(board, minlength=self.boards)
+        first = np.cumsum(counts) - counts
+        pick = first + (self.rng.random(self.boards) * counts).astype(np.intp)
+        return np.where(counts > 0, np.append(action, 0)[np.minimum(pick, len(action))], 0)
+
+    def snapshot(self, board: int) -> BoardSnapshot:
+        """One board as a BoardSnapshot, e.g. to hand it to AIPlayer"""
+        fish = bytes(int(f) if alive else 0 for f, alive in zip(self.fish[board], self.alive[board]))
+        penguins = tuple(
+            (player, *tile_position(int(index)))
+            for player in (0, 1) for index in self.penguins[board, player] if index != OFF_BOARD
+        )
+        phase = "game_over" if self.done[board] else "placement" if self.placing[board] else "playing"
+        return BoardSnapshot(fish, penguins, (int(self.scores[board, 0]), int(self.scores[board, 1])),
+                             int(self.side[board]), phase)
+
+def run_random(env: VectorEnv, steps: int) -> Tuple[int, float]:
+    """Play random actions for steps rounds, restarting finished boards;
+    returns the board-steps taken and the seconds they took"""
+    board_steps = 0
+    started = time.perf_counter()
+    for _ in range(steps):
+        board_steps += int((~env.done).sum())
+        legal = env.legal_actions()
+        env.step(env.random_actions(legal), legal)
+        if env.done.any():
+            env.reset(env.done)
+    return board_steps, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure VectorEnv throughput with random play")
+    parser.add_argument("--boards", type=int, default=1024)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    env = VectorEnv(args.boards, seed=args.seed)
+    board_steps, seconds = run_random(env, args.steps)
+    print(json.dumps({"boards": args.boards, "board_steps": board_steps, "seconds": round(seconds, 3),
+                      "board_steps_per_sec": round(board_steps / seconds)}))
+
+if __name__ == "__main__":
+    main()